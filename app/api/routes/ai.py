@@ -1,6 +1,5 @@
 """AI chat endpoint — SSE streaming via Anthropic SDK + OAuth auth endpoints."""
 
-import json
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse, HTMLResponse
@@ -111,11 +110,11 @@ async def _stream_events(
     project_name: str,
     db: AsyncSession,
 ):
-    """Async generator that yields SSE-formatted events from Claude."""
+    """Async generator that forwards SSE frames from Claude, already encoded."""
     service = get_claude_service()
     message = _build_message(body)
 
-    async for event in service.chat(
+    async for frame in service.chat(
         project_id=project_id,
         project_slug=project_slug,
         project_name=project_name,
@@ -124,22 +123,7 @@ async def _stream_events(
         model=body.model,
         db=db,
     ):
-        event_type = event.get("type", "")
-
-        if event_type == "text":
-            yield f"event: text\ndata: {json.dumps({'text': event['text']})}\n\n"
-
-        elif event_type == "tool_use_start":
-            yield f"event: tool_use\ndata: {json.dumps({'name': event['name'], 'status': 'starting'})}\n\n"
-
-        elif event_type == "tool_use":
-            yield f"event: tool_use\ndata: {json.dumps({'name': event['name'], 'input': event.get('input', {})})}\n\n"
-
-        elif event_type == "done":
-            yield f"event: done\ndata: {json.dumps({'model': event.get('model', ''), 'conversation_id': event.get('conversation_id')})}\n\n"
-
-        elif event_type == "error":
-            yield f"event: error\ndata: {json.dumps({'message': event.get('message', 'Unknown error')})}\n\n"
+        yield frame
 
 
 @ai_router.post("/chat")
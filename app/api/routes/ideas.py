@@ -18,7 +18,7 @@ from app.schemas.idea import (
     IdeaSearchRequest,
 )
 from app.api.routes.projects import get_project_with_access
-from app.services.embedding import get_embedding, embedding_to_json, embedding_from_json, cosine_similarity
+from app.services.embedding import get_embedding, embedding_to_bytes, embedding_from_bytes, top_k_similar
 from app.services.feasibility import score_idea_feasibility
 from app.models.knowledge import KnowledgeEntity
 from app.models.project import Project
@@ -66,7 +66,7 @@ async def _embed_idea(idea_id: str, text: str):
             result = await db.execute(select(Idea).where(Idea.id == idea_id))
             idea = result.scalar_one_or_none()
             if idea:
-                idea.embedding = embedding_to_json(emb)
+                idea.embedding = embedding_to_bytes(emb)
                 await db.flush()
                 await db.commit()
     except Exception as e:
@@ -124,10 +124,10 @@ async def create_idea(
     idea_id = str(uuid.uuid4())
 
     # Try to compute embedding inline; fall back to background
-    emb_json = None
+    emb_blob = None
     try:
         emb = await get_embedding(f"{body.title}\n{body.description}")
-        emb_json = embedding_to_json(emb)
+        emb_blob = embedding_to_bytes(emb)
     except Exception as e:
         logger.warning("idea.embed_inline_failed", error=str(e))
 
@@ -137,7 +137,7 @@ async def create_idea(
         title=body.title,
         description=body.description,
         category=body.category,
-        embedding=emb_json,
+        embedding=emb_blob,
         created_by=user.id,
     )
     db.add(idea)
@@ -369,15 +369,12 @@ async def semantic_search(
     )
     ideas = result.scalars().all()
 
-    scored = []
+    candidates = []
     for idea in ideas:
-        emb = embedding_from_json(idea.embedding)
-        if emb is None:
-            continue
-        sim = cosine_similarity(query_emb, emb)
-        scored.append((sim, idea))
+        emb = embedding_from_bytes(idea.embedding)
+        if emb is not None:
+            candidates.append((idea, emb))
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top = scored[: body.limit]
+    top = top_k_similar(query_emb, candidates, body.limit)
 
-    return [_idea_response(idea) for _, idea in top]
+    return [_idea_response(idea) for idea in top]
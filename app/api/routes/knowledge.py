@@ -16,12 +16,14 @@ from app.schemas.knowledge import (
     GraphNode,
     GraphEdge,
     SemanticSearchRequest,
+    BatchSearchRequest,
 )
 from app.api.routes.projects import get_project_with_access
-from app.services.embedding import get_embedding, embedding_to_json, embedding_from_json, cosine_similarity
+from app.services.embedding import get_embedding, embedding_to_bytes, embedding_from_bytes, top_k_similar
 from app.services.recall_knowledge import (
     store_knowledge,
     search_knowledge,
+    search_knowledge_batch,
     get_knowledge_graph,
     migrate_project_knowledge,
 )
@@ -32,6 +34,9 @@ import structlog
 
 logger = structlog.get_logger()
 
+# Upper bound on queries per /recall-search/batch request
+_MAX_BATCH_QUERIES = 20
+
 router = APIRouter(prefix="/projects/{project_id}/knowledge", tags=["knowledge"])
 
 
@@ -81,13 +86,13 @@ async def create_entity(
     await get_project_with_access(project_id, user, db, min_role="editor")
 
     # Generate embedding from name + description
-    emb_json = None
+    emb_blob = None
     embed_text = body.name
     if body.description:
         embed_text = f"{body.name}: {body.description}"
     try:
         emb = await get_embedding(embed_text)
-        emb_json = embedding_to_json(emb)
+        emb_blob = embedding_to_bytes(emb)
     except Exception as e:
         logger.warning("knowledge.embed_failed", error=str(e))
 
@@ -103,7 +108,7 @@ async def create_entity(
         description=body.description,
         path=body.path,
         metadata_json=metadata_str,
-        embedding=emb_json,
+        embedding=emb_blob,
     )
     db.add(entity)
     await db.flush()
@@ -171,7 +176,7 @@ async def update_entity(
             embed_text = f"{entity.name}: {entity.description}"
         try:
             emb = await get_embedding(embed_text)
-            entity.embedding = embedding_to_json(emb)
+            entity.embedding = embedding_to_bytes(emb)
         except Exception as e:
             logger.warning("knowledge.re_embed_failed", entity_id=entity_id, error=str(e))
 
@@ -401,18 +406,15 @@ async def semantic_search(
     result = await db.execute(query)
     entities = result.scalars().all()
 
-    scored = []
+    candidates = []
     for entity in entities:
-        emb = embedding_from_json(entity.embedding)
-        if emb is None:
-            continue
-        sim = cosine_similarity(query_emb, emb)
-        scored.append((sim, entity))
+        emb = embedding_from_bytes(entity.embedding)
+        if emb is not None:
+            candidates.append((entity, emb))
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top = scored[: body.limit]
+    top = top_k_similar(query_emb, candidates, body.limit)
 
-    return [_entity_response(entity) for _, entity in top]
+    return [_entity_response(entity) for entity in top]
 
 
 # ---------- Recall-backed endpoints ----------
@@ -453,3 +455,20 @@ async def recall_search(
     project = await get_project_with_access(project_id, user, db)
     results = await search_knowledge(project.slug, body.query, body.limit)
     return results
+
+
+@router.post("/recall-search/batch")
+async def recall_search_batch(
+    project_id: str,
+    body: BatchSearchRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Several Recall searches in one request; one result list per query, in order."""
+    if len(body.queries) > _MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {_MAX_BATCH_QUERIES} queries per batch",
+        )
+    project = await get_project_with_access(project_id, user, db)
+    return await search_knowledge_batch(project.slug, body.queries, body.limit)
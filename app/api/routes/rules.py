@@ -10,6 +10,7 @@ from app.models.user import User
 from app.models.project import Project
 from app.schemas.rules import RulePinRequest, RuleSearchRequest, RecallMemoryResponse
 from app.api.routes.projects import get_project_with_access
+from app.services.recall_knowledge import invalidate_search_cache
 import structlog
 
 logger = structlog.get_logger()
@@ -82,6 +83,7 @@ async def pin_rule(
             importance=max(memory.get("importance", 0.5), 0.8),
             tags=tags,
         )
+        invalidate_search_cache(memory.get("domain", "general"))
         return {"status": "pinned"}
     except ConnectionError as e:
         raise HTTPException(status_code=503, detail=f"Recall unavailable: {e}")
@@ -107,6 +109,7 @@ async def unpin_rule(
             importance=memory.get("importance", 0.5),
             tags=tags,
         )
+        invalidate_search_cache(memory.get("domain", "general"))
         return {"status": "unpinned"}
     except ConnectionError as e:
         raise HTTPException(status_code=503, detail=f"Recall unavailable: {e}")
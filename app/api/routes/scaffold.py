@@ -8,23 +8,24 @@ from app.models.user import User
 from app.models.scaffold import ScaffoldJob
 from app.schemas.scaffold import ScaffoldRequest, ScaffoldApproval, ScaffoldResponse
 from app.api.routes.projects import get_project_with_access
-from app.services.scaffold import run_scaffold_job
+from app.services.scaffold import run_scaffold_job, load_generated_files
+import asyncio
 import uuid
-import json
+import orjson
 
 router = APIRouter(prefix="/projects/{project_id}/scaffold", tags=["scaffold"])
 
 
-def _scaffold_response(job: ScaffoldJob) -> ScaffoldResponse:
-    """Build a ScaffoldResponse, deserializing JSON Text columns."""
+async def _scaffold_response(job: ScaffoldJob) -> ScaffoldResponse:
+    """Build a ScaffoldResponse, deserializing JSON Text columns and stored files."""
     return ScaffoldResponse(
         id=job.id,
         project_id=job.project_id,
         canvas_id=job.canvas_id,
-        component_ids=json.loads(job.component_ids) if job.component_ids else [],
+        component_ids=orjson.loads(job.component_ids) if job.component_ids else [],
         status=job.status,
-        spec_json=json.loads(job.spec_json) if job.spec_json else None,
-        generated_files=json.loads(job.generated_files) if job.generated_files else None,
+        spec_json=orjson.loads(job.spec_json) if job.spec_json else None,
+        generated_files=await load_generated_files(job),
         error_message=job.error_message,
         created_by=job.created_by,
         created_at=job.created_at,
@@ -53,7 +54,7 @@ async def create_scaffold_job(
         id=job_id,
         project_id=project_id,
         canvas_id=body.canvas_id,
-        component_ids=json.dumps(body.component_ids),
+        component_ids=orjson.dumps(body.component_ids).decode(),
         created_by=user.id,
     )
     db.add(job)
@@ -61,7 +62,7 @@ async def create_scaffold_job(
 
     await enqueue("scaffold", _run_scaffold, job.id)
 
-    return _scaffold_response(job)
+    return await _scaffold_response(job)
 
 
 @router.get("", response_model=list[ScaffoldResponse])
@@ -80,7 +81,8 @@ async def list_scaffold_jobs(
     )
     jobs = result.scalars().all()
 
-    return [_scaffold_response(job) for job in jobs]
+    # Each job's files are read on a worker thread; gather overlaps the reads
+    return await asyncio.gather(*(_scaffold_response(job) for job in jobs))
 
 
 @router.get("/{job_id}", response_model=ScaffoldResponse)
@@ -103,7 +105,7 @@ async def get_scaffold_job(
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scaffold job not found")
 
-    return _scaffold_response(job)
+    return await _scaffold_response(job)
 
 
 @router.post("/{job_id}/approve", response_model=ScaffoldResponse)
@@ -136,4 +138,4 @@ async def approve_scaffold_job(
     job.status = "approved" if body.approved else "rejected"
     await db.flush()
 
-    return _scaffold_response(job)
+    return await _scaffold_response(job)
@@ -40,6 +40,9 @@ class Settings(BaseSettings):
     ollama_embed_model: str = "bge-large"
     embedding_dims: int = 1024
 
+    # MCP servers (names from ~/.claude.json) to connect at startup
+    mcp_autoconnect: list[str] = []
+
     # Recall
     recall_url: str = "http://192.168.50.19:8200"
 
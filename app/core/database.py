@@ -1,8 +1,12 @@
+import json
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import event
+from sqlalchemy import event, text
+import structlog
 from app.core.config import get_settings
 
+logger = structlog.get_logger()
+
 
 class Base(DeclarativeBase):
     pass
@@ -36,6 +40,66 @@ async def get_db() -> AsyncSession:
             raise
 
 
+def _ensure_indexes(sync_conn) -> None:
+    """create_all skips existing tables — add indexes declared since they were created."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+# Set by init_db — False when the SQLite build has no FTS5 (idea search falls back to LIKE)
+idea_fts_enabled = False
+
+
+async def _ensure_idea_fts(conn) -> None:
+    """Create the FTS5 idea index and its sync triggers, backfilling on first run."""
+    global idea_fts_enabled
+    from app.models.idea import IDEA_FTS_DDL, IDEA_FTS_BACKFILL
+
+    has_fts5 = (
+        await conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')"))
+    ).scalar()
+    if not has_fts5:
+        logger.warning("db.fts5_unavailable")
+        return
+
+    exists = (
+        await conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'idea_fts'")
+        )
+    ).scalar()
+    for ddl in IDEA_FTS_DDL:
+        await conn.execute(text(ddl))
+    if not exists:
+        await conn.execute(text(IDEA_FTS_BACKFILL))
+    idea_fts_enabled = True
+
+
+async def _migrate_json_embeddings(conn) -> None:
+    """Repack embeddings written as JSON text into float32 blobs."""
+    from app.services.embedding import embedding_to_bytes
+
+    for table in ("ideas", "knowledge_entities"):
+        rows = (
+            await conn.execute(
+                text(f"SELECT id, embedding FROM {table} WHERE typeof(embedding) = 'text'")
+            )
+        ).all()
+        if not rows:
+            continue
+        await conn.execute(
+            text(f"UPDATE {table} SET embedding = :emb WHERE id = :id"),
+            [
+                {"id": row.id, "emb": embedding_to_bytes(json.loads(row.embedding))}
+                for row in rows
+            ],
+        )
+        logger.info("db.embeddings_repacked", table=table, count=len(rows))
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_ensure_indexes)
+        await _ensure_idea_fts(conn)
+        await _migrate_json_embeddings(conn)
@@ -28,9 +28,23 @@ VALID_REL_TYPES = {
 class RecallClient:
     """Thin async wrapper around the Recall HTTP API with graceful degradation."""
 
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 100,
+        max_keepalive: int = 100,
+    ):
         self._base = base_url.rstrip("/")
-        self._client = httpx.AsyncClient(base_url=self._base, timeout=30.0)
+        # Keep as many idle connections as batched callers open, so a migration
+        # batch reuses sockets instead of reconnecting past httpx's default of 20
+        self._client = httpx.AsyncClient(
+            base_url=self._base,
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+            ),
+        )
         self._available: bool | None = None  # None = unknown, check on first use
 
     @property
@@ -58,20 +72,21 @@ class RecallClient:
         domain: str = "general",
         importance: float = 0.5,
         tags: list[str] | None = None,
+        meta: dict | None = None,
     ) -> dict:
         self._check_available()
         recall_type = MEMORY_TYPE_MAP.get(memory_type, "semantic")
+        body: dict = {
+            "content": content,
+            "memory_type": recall_type,
+            "domain": domain,
+            "importance": importance,
+            "tags": tags or [],
+        }
+        if meta:
+            body["meta"] = meta
         try:
-            resp = await self._client.post(
-                "/memory/store",
-                json={
-                    "content": content,
-                    "memory_type": recall_type,
-                    "domain": domain,
-                    "importance": importance,
-                    "tags": tags or [],
-                },
-            )
+            resp = await self._client.post("/memory/store", json=body)
             resp.raise_for_status()
             self._available = True
             return resp.json()
@@ -63,6 +63,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("recall.unavailable", error=str(e))
 
+    # Connect configured MCP servers (subprocess startups overlap)
+    if settings.mcp_autoconnect:
+        from app.services.mcp_manager import get_mcp_manager
+
+        results = await get_mcp_manager().connect_all(settings.mcp_autoconnect)
+        for name, result in zip(settings.mcp_autoconnect, results):
+            if isinstance(result, BaseException):
+                logger.warning("mcp.autoconnect_failed", server=name, error=str(result))
+
     yield
 
     # Shutdown MCP connections
@@ -73,6 +82,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("mcp.shutdown_error", error=str(e))
 
+    # Close pooled Ollama and Recall connections
+    from app.core.recall_client import get_recall_client
+    from app.services import embedding, llm
+
+    await embedding.close_client()
+    await llm.close_client()
+    await get_recall_client().close()
+
     logger.info("shutdown")
 
 
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import String, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
 
@@ -26,6 +26,10 @@ class Canvas(Base):
     project: Mapped["Project"] = relationship(back_populates="canvases")
     components: Mapped[list["CanvasComponent"]] = relationship(back_populates="canvas", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_canvas_project", "project_id"),
+    )
+
 
 class CanvasComponent(Base):
     __tablename__ = "canvas_components"
@@ -43,3 +47,7 @@ class CanvasComponent(Base):
     )
 
     canvas: Mapped["Canvas"] = relationship(back_populates="components")
+
+    __table_args__ = (
+        Index("ix_cc_canvas", "canvas_id"),
+    )
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Text, Integer
+from sqlalchemy import String, DateTime, ForeignKey, Text, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
 
@@ -28,6 +28,11 @@ class Conversation(Base):
         order_by="ConversationMessage.created_at",
     )
 
+    __table_args__ = (
+        # Most-recent lookup: equality on user/project, then walk updated_at from the end
+        Index("ix_conv_user_project_updated", "user_id", "project_id", "updated_at"),
+    )
+
 
 class ConversationMessage(Base):
     __tablename__ = "conversation_messages"
@@ -42,3 +47,7 @@ class ConversationMessage(Base):
     )
 
     conversation: Mapped["Conversation"] = relationship(back_populates="messages")
+
+    __table_args__ = (
+        Index("ix_cm_conversation_created", "conversation_id", "created_at"),
+    )
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Text, Integer, Float
+from sqlalchemy import String, DateTime, ForeignKey, Text, Integer, Float, Index, LargeBinary, column, table
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
 
@@ -16,7 +16,7 @@ class Idea(Base):
     category: Mapped[str | None] = mapped_column(String(100), nullable=True)
     feasibility_score: Mapped[float | None] = mapped_column(Float, nullable=True)
     feasibility_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
-    embedding: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON array of floats
+    embedding: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)  # packed float32
     created_by: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
@@ -31,6 +31,41 @@ class Idea(Base):
     votes: Mapped[list["IdeaVote"]] = relationship(back_populates="idea", cascade="all, delete-orphan")
     comments: Mapped[list["IdeaComment"]] = relationship(back_populates="idea", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_idea_project_status", "project_id", "status"),
+    )
+
+
+# Full-text index over idea title/description (SQLite FTS5), kept in sync by triggers.
+# Rows are keyed by the string idea id rather than rowid, which VACUUM may renumber.
+idea_fts = table("idea_fts", column("idea_id"), column("title"), column("description"))
+
+IDEA_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS idea_fts USING fts5(idea_id UNINDEXED, title, description)",
+    """CREATE TRIGGER IF NOT EXISTS ideas_fts_ai AFTER INSERT ON ideas BEGIN
+        INSERT INTO idea_fts(idea_id, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS ideas_fts_ad AFTER DELETE ON ideas BEGIN
+        DELETE FROM idea_fts WHERE idea_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS ideas_fts_au AFTER UPDATE OF title, description ON ideas BEGIN
+        DELETE FROM idea_fts WHERE idea_id = old.id;
+        INSERT INTO idea_fts(idea_id, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+# Backfill for databases created before the FTS index existed
+IDEA_FTS_BACKFILL = (
+    "INSERT INTO idea_fts(idea_id, title, description) "
+    "SELECT id, title, description FROM ideas"
+)
+
+
+def fts_match_query(query: str) -> str:
+    """Turn free text into an FTS5 MATCH expression: every term, prefix-matched."""
+    terms = [t.replace('"', '""') for t in query.split()]
+    return " ".join(f'"{t}"*' for t in terms if t)
+
 
 class IdeaVote(Base):
     __tablename__ = "idea_votes"
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Text, Float, Index
+from sqlalchemy import String, DateTime, ForeignKey, Text, Float, Index, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column
 from app.core.database import Base
 
@@ -15,7 +15,7 @@ class KnowledgeEntity(Base):
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     path: Mapped[str | None] = mapped_column(String(500), nullable=True)
     metadata_json: Mapped[str | None] = mapped_column(Text, nullable=True)
-    embedding: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON array
+    embedding: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)  # packed float32
     source_type: Mapped[str | None] = mapped_column(String(50), nullable=True)
     source_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
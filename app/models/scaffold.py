@@ -13,7 +13,7 @@ class ScaffoldJob(Base):
     canvas_id: Mapped[str] = mapped_column(String(36), ForeignKey("canvases.id"), nullable=False)
     component_ids: Mapped[str] = mapped_column(Text, nullable=False)  # JSON array
     spec_json: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON
-    generated_files: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON {path: content}
+    generated_files: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON [path, ...] under scaffolds/<job id>/ (legacy rows: {path: content})
     status: Mapped[str] = mapped_column(String(20), default="pending")
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_by: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
@@ -81,3 +81,8 @@ class SemanticSearchRequest(BaseModel):
     query: str
     limit: int = 20
     entity_type: str | None = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str]
+    limit: int = 20
@@ -2,24 +2,32 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
+import time
 import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import AsyncIterator
+from typing import AsyncIterator, Awaitable, Callable
 
 import anthropic
+import orjson
 import structlog
-from sqlalchemy import select, func
+from sqlalchemy import select, func, text, update, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import raiseload, selectinload
 
 from app.core.claude_auth import get_claude_auth, ClaudeAuth
+from app.core import database
 from app.core.config import get_settings
 from app.core.recall_client import get_recall_client
 from app.services.mcp_manager import get_mcp_manager
 from app.models.project import Project
 from app.models.canvas import Canvas, CanvasComponent
-from app.models.idea import Idea
+from app.models.idea import Idea, idea_fts, fts_match_query
 from app.models.scaffold import ScaffoldJob
 from app.models.deploy import Environment
 from app.models.conversation import Conversation, ConversationMessage
@@ -86,6 +94,10 @@ TOOLS = [
             "properties": {
                 "project_id": {"type": "string"},
                 "query": {"type": "string"},
+                "hybrid": {
+                    "type": "boolean",
+                    "description": "Re-rank keyword hits by semantic similarity to the query. Default false.",
+                },
             },
             "required": ["project_id", "query"],
         },
@@ -232,13 +244,35 @@ TOOLS = [
 # ── Tool execution (direct Python, same process) ──────────────────────────
 
 
+_ORJSON_OPTS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+# Hard cap on rows returned by list tools — thousands of rows are never useful to the LLM
+_TOOL_ROW_LIMIT = 200
+
+
+def _dumps(obj) -> str:
+    """Serialize a tool result. Datetimes are emitted natively as UTC ISO-8601."""
+    return orjson.dumps(obj, option=_ORJSON_OPTS).decode()
+
+
+async def _dumps_stream(rows, to_dict) -> str:
+    """Encode streamed ORM rows as a JSON array without materializing the full list."""
+    buf = bytearray(b"[")
+    async for row in rows:
+        if len(buf) > 1:
+            buf += b","
+        buf += orjson.dumps(to_dict(row), option=_ORJSON_OPTS)
+    buf += b"]"
+    return buf.decode()
+
+
 def _safe_json(val: str | None) -> dict | list | None:
     """Parse a JSON text column, returning None on failure."""
     if not val:
         return None
     try:
-        return json.loads(val)
-    except (json.JSONDecodeError, TypeError):
+        return orjson.loads(val)
+    except (orjson.JSONDecodeError, TypeError):
         return None
 
 
@@ -250,7 +284,7 @@ async def _tool_get_project_summary(project_id: str, db: AsyncSession) -> str:
     )
     project = result.scalar_one_or_none()
     if not project:
-        return json.dumps({"error": "Project not found"})
+        return _dumps({"error": "Project not found"})
 
     canvas_count = (
         await db.execute(
@@ -266,7 +300,7 @@ async def _tool_get_project_summary(project_id: str, db: AsyncSession) -> str:
         )
     ).scalar() or 0
 
-    return json.dumps(
+    return _dumps(
         {
             "id": project.id,
             "name": project.name,
@@ -275,9 +309,7 @@ async def _tool_get_project_summary(project_id: str, db: AsyncSession) -> str:
             "member_count": len(project.members),
             "canvas_count": canvas_count,
             "idea_count": idea_count,
-            "created_at": project.created_at.isoformat()
-            if project.created_at
-            else None,
+            "created_at": project.created_at,
         }
     )
 
@@ -285,25 +317,23 @@ async def _tool_get_project_summary(project_id: str, db: AsyncSession) -> str:
 async def _tool_get_canvas_components(
     project_id: str, canvas_id: str, db: AsyncSession
 ) -> str:
-    result = await db.execute(
-        select(CanvasComponent).where(
-            CanvasComponent.canvas_id == canvas_id,
-        )
+    components = await db.stream_scalars(
+        select(CanvasComponent)
+        .where(CanvasComponent.canvas_id == canvas_id)
+        .limit(_TOOL_ROW_LIMIT)
+        .execution_options(yield_per=100)
     )
-    components = result.scalars().all()
-    return json.dumps(
-        [
-            {
-                "id": c.id,
-                "shape_id": c.shape_id,
-                "name": c.name,
-                "component_type": c.component_type,
-                "tech_stack": c.tech_stack,
-                "description": c.description,
-                "metadata": _safe_json(c.metadata_json),
-            }
-            for c in components
-        ]
+    return await _dumps_stream(
+        components,
+        lambda c: {
+            "id": c.id,
+            "shape_id": c.shape_id,
+            "name": c.name,
+            "component_type": c.component_type,
+            "tech_stack": c.tech_stack,
+            "description": c.description,
+            "metadata": _safe_json(c.metadata_json),
+        },
     )
 
 
@@ -324,10 +354,10 @@ async def _tool_list_canvases(project_id: str, db: AsyncSession) -> str:
                 "id": c.id,
                 "name": c.name,
                 "component_count": comp_count,
-                "created_at": c.created_at.isoformat() if c.created_at else None,
+                "created_at": c.created_at,
             }
         )
-    return json.dumps(out)
+    return _dumps(out)
 
 
 async def _tool_get_ideas(
@@ -336,37 +366,83 @@ async def _tool_get_ideas(
     q = select(Idea).where(Idea.project_id == project_id)
     if status:
         q = q.where(Idea.status == status)
-    q = q.order_by(Idea.created_at.desc())
-    result = await db.execute(q)
-    ideas = result.scalars().all()
-    return json.dumps(
-        [
-            {
-                "id": i.id,
-                "title": i.title,
-                "description": i.description,
-                "status": i.status,
-                "category": i.category,
-                "feasibility_score": i.feasibility_score,
-                "created_at": i.created_at.isoformat() if i.created_at else None,
-            }
-            for i in ideas
-        ]
+    q = q.order_by(Idea.created_at.desc()).limit(_TOOL_ROW_LIMIT)
+    ideas = await db.stream_scalars(q.execution_options(yield_per=100))
+    return await _dumps_stream(
+        ideas,
+        lambda i: {
+            "id": i.id,
+            "title": i.title,
+            "description": i.description,
+            "status": i.status,
+            "category": i.category,
+            "feasibility_score": i.feasibility_score,
+            "created_at": i.created_at,
+        },
     )
 
 
-async def _tool_search_ideas(project_id: str, query: str, db: AsyncSession) -> str:
-    # Simple ILIKE search (same as REST endpoint)
-    pattern = f"%{query}%"
-    result = await db.execute(
-        select(Idea)
-        .where(Idea.project_id == project_id)
-        .where((Idea.title.ilike(pattern)) | (Idea.description.ilike(pattern)))
-        .order_by(Idea.created_at.desc())
-        .limit(20)
+# Reciprocal rank fusion: k dampens top-rank dominance; keyword/semantic weights
+_RRF_K = 60
+_RRF_WEIGHTS = (0.4, 0.6)
+
+
+async def _rerank_ideas(ideas: list[Idea], query: str) -> list[Idea]:
+    """Fuse keyword rank with embedding-similarity rank; keyword order if embedding fails."""
+    from app.services.embedding import (
+        get_embedding_safe,
+        embedding_from_bytes,
+        top_k_similar,
     )
-    ideas = result.scalars().all()
-    return json.dumps(
+
+    query_emb = await get_embedding_safe(query)
+    if query_emb is None:
+        return ideas
+
+    candidates = []
+    for idx, idea in enumerate(ideas):
+        emb = embedding_from_bytes(idea.embedding)
+        if emb is not None:
+            candidates.append((idx, emb))
+    ranked = top_k_similar(query_emb, candidates, len(candidates))
+    semantic_rank = {idx: rank for rank, idx in enumerate(ranked)}
+
+    kw_weight, sem_weight = _RRF_WEIGHTS
+    scores = []
+    for idx in range(len(ideas)):
+        score = kw_weight / (_RRF_K + idx)
+        if idx in semantic_rank:
+            score += sem_weight / (_RRF_K + semantic_rank[idx])
+        scores.append(score)
+    order = sorted(range(len(ideas)), key=scores.__getitem__, reverse=True)
+    return [ideas[idx] for idx in order]
+
+
+async def _tool_search_ideas(
+    project_id: str, query: str, db: AsyncSession, hybrid: bool = False
+) -> str:
+    q = select(Idea).where(Idea.project_id == project_id)
+    if database.idea_fts_enabled:
+        # FTS5 full-text search, best BM25 match first
+        match = fts_match_query(query)
+        if not match:
+            return _dumps([])
+        q = (
+            q.join(idea_fts, idea_fts.c.idea_id == Idea.id)
+            .where(text("idea_fts MATCH :match").bindparams(match=match))
+            .order_by(text("bm25(idea_fts)"), Idea.feasibility_score.desc())
+        )
+    else:
+        # Simple ILIKE search (same as REST endpoint)
+        pattern = f"%{query}%"
+        q = q.where(
+            (Idea.title.ilike(pattern)) | (Idea.description.ilike(pattern))
+        ).order_by(Idea.created_at.desc())
+    result = await db.execute(q.limit(20))
+    ideas = list(result.scalars().all())
+    if hybrid and len(ideas) > 1:
+        ideas = await _rerank_ideas(ideas, query)
+    return _dumps(
         [
             {
                 "id": i.id,
@@ -381,6 +457,8 @@ async def _tool_search_ideas(project_id: str, query: str, db: AsyncSession) -> s
 
 
 async def _tool_get_scaffold_job(project_id: str, job_id: str, db: AsyncSession) -> str:
+    from app.services.scaffold import load_generated_files
+
     result = await db.execute(
         select(ScaffoldJob).where(
             ScaffoldJob.id == job_id,
@@ -389,17 +467,17 @@ async def _tool_get_scaffold_job(project_id: str, job_id: str, db: AsyncSession)
     )
     job = result.scalar_one_or_none()
     if not job:
-        return json.dumps({"error": "Scaffold job not found"})
-    return json.dumps(
+        return _dumps({"error": "Scaffold job not found"})
+    return _dumps(
         {
             "id": job.id,
             "status": job.status,
             "component_ids": _safe_json(job.component_ids),
             "spec": _safe_json(job.spec_json),
-            "generated_files": _safe_json(job.generated_files),
+            "generated_files": await load_generated_files(job),
             "error_message": job.error_message,
-            "created_at": job.created_at.isoformat() if job.created_at else None,
-            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+            "created_at": job.created_at,
+            "completed_at": job.completed_at,
         }
     )
 
@@ -409,14 +487,14 @@ async def _tool_get_deploy_config(project_id: str, db: AsyncSession) -> str:
         select(Environment).where(Environment.project_id == project_id)
     )
     envs = result.scalars().all()
-    return json.dumps(
+    return _dumps(
         [
             {
                 "id": e.id,
                 "name": e.name,
                 "config": _safe_json(e.config_json),
                 "compose_yaml": e.compose_yaml,
-                "created_at": e.created_at.isoformat() if e.created_at else None,
+                "created_at": e.created_at,
             }
             for e in envs
         ]
@@ -430,10 +508,16 @@ async def _tool_get_knowledge_context(project_slug: str, query: str) -> str:
         return (
             context
             if context
-            else json.dumps({"result": "No knowledge found for this query."})
+            else _dumps({"result": "No knowledge found for this query."})
         )
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
+
+
+def _pushed_to_recall(entity) -> bool:
+    """True once a conversation KnowledgeEntity's Recall push succeeded (recall_id recorded)."""
+    metadata = _safe_json(entity.metadata_json)
+    return isinstance(metadata, dict) and "recall_id" in metadata
 
 
 async def _tool_push_to_recall(
@@ -446,32 +530,60 @@ async def _tool_push_to_recall(
     from app.models.knowledge import KnowledgeEntity
     from app.services.recall_knowledge import store_knowledge
 
-    stored = []
+    # Drop empty items and in-batch repeats (first occurrence wins)
+    pending: dict[str, str] = {}
     for item in items:
-        content = item.get("content", "")
-        entity_type = item.get("entity_type", "concept")
-        if not content:
+        content = (item.get("content") or "").strip()
+        if content and content not in pending:
+            pending[content] = item.get("entity_type", "concept")
+
+    # Reuse rows already saved from a conversation. Only rows whose Recall push
+    # succeeded (recall_id recorded) are duplicates; local_only rows are retried.
+    existing: dict[str, KnowledgeEntity] = {}
+    if pending:
+        result = await db.execute(
+            select(KnowledgeEntity).where(
+                KnowledgeEntity.project_id == project_id,
+                KnowledgeEntity.source_type == "conversation",
+                KnowledgeEntity.description.in_(list(pending)),
+            )
+        )
+        for row in result.scalars():
+            known = existing.get(row.description)
+            if known is None or (_pushed_to_recall(row) and not _pushed_to_recall(known)):
+                existing[row.description] = row
+
+    stored = []
+    for content, entity_type in pending.items():
+        entity = existing.get(content)
+        if entity is not None and _pushed_to_recall(entity):
+            stored.append({"content": content[:100], "status": "duplicate"})
             continue
 
         # Create local entity
-        entity = KnowledgeEntity(
-            project_id=project_id,
-            name=content[:300],
-            entity_type=entity_type,
-            description=content,
-            source_type="conversation",
-        )
-        db.add(entity)
+        if entity is None:
+            entity = KnowledgeEntity(
+                project_id=project_id,
+                name=content[:300],
+                entity_type=entity_type,
+                description=content,
+                source_type="conversation",
+            )
+            db.add(entity)
 
         # Push to Recall
         try:
-            await store_knowledge(
+            result = await store_knowledge(
                 project_slug=project_slug,
                 name=content[:100],
                 entity_type=entity_type,
                 description=content,
                 metadata={"source": "conversation"},
             )
+            metadata = _safe_json(entity.metadata_json)
+            metadata = metadata if isinstance(metadata, dict) else {}
+            metadata["recall_id"] = result.get("id", "")
+            entity.metadata_json = _dumps(metadata)
             stored.append({"content": content[:100], "status": "stored"})
         except Exception as e:
             logger.warning("push_to_recall.failed", error=str(e))
@@ -480,7 +592,7 @@ async def _tool_push_to_recall(
             )
 
     await db.flush()
-    return json.dumps({"stored": stored, "count": len(stored)})
+    return _dumps({"stored": stored, "count": len(stored)})
 
 
 async def _tool_create_idea(
@@ -493,40 +605,52 @@ async def _tool_create_idea(
 ) -> str:
     """Create an idea from the AI chat tool."""
     from app.core.background import enqueue
-    from app.services.embedding import get_embedding, embedding_to_json
+    from app.services.embedding import get_embedding, embedding_to_bytes
     from app.services.feasibility import score_idea_feasibility
     from app.core.database import async_session
 
     idea_id = str(uuid.uuid4())
 
-    # Try inline embedding, graceful fallback
-    emb_json = None
-    try:
-        emb = await get_embedding(f"{title}\n{description}")
-        emb_json = embedding_to_json(emb)
-    except Exception as e:
-        logger.warning("create_idea.embed_failed", error=str(e))
-
     idea = Idea(
         id=idea_id,
         project_id=project_id,
         title=title,
         description=description,
         category=category,
-        embedding=emb_json,
         created_by=user_id,
     )
     db.add(idea)
     await db.flush()
+    # The request session otherwise commits only when the stream ends; commit
+    # now so the background jobs' own sessions can see the row. Tools run one
+    # at a time on this session, so nothing else is mid-write.
+    await db.commit()
+
+    # Background embedding — keeps the Ollama round-trip off the tool result path
+    async def _run_embed(iid: str, text: str):
+        try:
+            emb = await get_embedding(text)
+        except Exception as e:
+            logger.warning("create_idea.embed_failed", idea_id=iid, error=str(e))
+            return
+        async with async_session() as sess:
+            result = await sess.execute(select(Idea).where(Idea.id == iid))
+            row = result.scalar_one_or_none()
+            if not row:
+                logger.warning("create_idea.embed_row_missing", idea_id=iid)
+                return
+            row.embedding = embedding_to_bytes(emb)
+            await sess.commit()
 
     # Background feasibility scoring
     async def _run_feasibility(iid: str):
         async with async_session() as sess:
             await score_idea_feasibility(iid, sess)
 
+    await enqueue("embed_idea", _run_embed, idea.id, f"{title}\n{description}")
     await enqueue("feasibility", _run_feasibility, idea.id)
 
-    return json.dumps(
+    return _dumps(
         {
             "status": "created",
             "idea_id": idea.id,
@@ -543,10 +667,33 @@ def _autopilot_dir(work_dir: str | None = None) -> Path:
     return base / ".autopilot"
 
 
+# (path, parsed) -> ((st_mtime_ns, st_size), content); re-read only when the file changes
+_AP_CACHE: dict[tuple[str, bool], tuple[tuple[int, int], str | dict]] = {}
+_AP_CACHE_MAX = 32
+
+
+def _read_autopilot_file(path: Path, parse: bool = False) -> str | dict:
+    """Read (and optionally JSON-parse) an .autopilot file, cached by mtime."""
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    key = (str(path), parse)
+    cached = _AP_CACHE.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    content: str | dict = path.read_text(encoding="utf-8")
+    if parse:
+        content = orjson.loads(content)
+    if key not in _AP_CACHE and len(_AP_CACHE) >= _AP_CACHE_MAX:
+        _AP_CACHE.pop(next(iter(_AP_CACHE)))
+    _AP_CACHE[key] = (stamp, content)
+    return content
+
+
 def _tool_autopilot_status(work_dir: str | None = None) -> str:
     ap = _autopilot_dir(work_dir)
     if not ap.exists():
-        return json.dumps(
+        return _dumps(
             {
                 "error": "No .autopilot/ directory found",
                 "hint": "Run /plan first to create an Autopilot spec.",
@@ -564,18 +711,17 @@ def _tool_autopilot_status(work_dir: str | None = None) -> str:
     progress_file = ap / "progress.json"
     if progress_file.exists():
         try:
-            progress = json.loads(progress_file.read_text(encoding="utf-8"))
+            progress = _read_autopilot_file(progress_file, parse=True)
             tasks = progress.get("tasks", [])
+            counts = Counter(t.get("status") for t in tasks)
             result["task_summary"] = {
                 "total": len(tasks),
-                "done": sum(1 for t in tasks if t.get("status") == "DONE"),
-                "in_progress": sum(
-                    1 for t in tasks if t.get("status") == "IN_PROGRESS"
-                ),
-                "pending": sum(1 for t in tasks if t.get("status") == "PENDING"),
-                "blocked": sum(1 for t in tasks if t.get("status") == "BLOCKED"),
+                "done": counts["DONE"],
+                "in_progress": counts["IN_PROGRESS"],
+                "pending": counts["PENDING"],
+                "blocked": counts["BLOCKED"],
             }
-        except (json.JSONDecodeError, OSError):
+        except (orjson.JSONDecodeError, OSError):
             result["task_summary"] = {"error": "Could not parse progress.json"}
 
     # Read last few lines of build log
@@ -590,39 +736,114 @@ def _tool_autopilot_status(work_dir: str | None = None) -> str:
     # Check for spec
     result["has_spec"] = (ap / "spec.md").exists()
 
-    return json.dumps(result)
+    return _dumps(result)
 
 
 def _tool_autopilot_read_spec(work_dir: str | None = None) -> str:
     spec = _autopilot_dir(work_dir) / "spec.md"
     if not spec.exists():
-        return json.dumps({"error": "No spec.md found. Run /plan to create one."})
+        return _dumps({"error": "No spec.md found. Run /plan to create one."})
     try:
-        return spec.read_text(encoding="utf-8")
+        return _read_autopilot_file(spec)
     except OSError as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def _tool_autopilot_read_progress(work_dir: str | None = None) -> str:
     progress = _autopilot_dir(work_dir) / "progress.json"
     if not progress.exists():
-        return json.dumps({"error": "No progress.json found."})
+        return _dumps({"error": "No progress.json found."})
     try:
-        return progress.read_text(encoding="utf-8")
+        return _read_autopilot_file(progress)
     except OSError as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def _tool_autopilot_read_log(work_dir: str | None = None, tail_lines: int = 50) -> str:
     log = _autopilot_dir(work_dir) / "build.log"
     if not log.exists():
-        return json.dumps({"error": "No build.log found."})
+        return _dumps({"error": "No build.log found."})
     try:
         lines = log.read_text(encoding="utf-8").splitlines()
         tail = lines[-tail_lines:] if len(lines) > tail_lines else lines
         return "\n".join(tail)
     except OSError as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
+
+
+@dataclass(slots=True)
+class _ToolCtx:
+    """Per-call context handed to every tool handler."""
+
+    project_id: str
+    project_slug: str
+    user_id: str
+    db: AsyncSession
+
+
+def _sync_tool(fn: Callable[[dict, _ToolCtx], str]) -> Callable[[dict, _ToolCtx], Awaitable[str]]:
+    """Adapt a synchronous tool handler to the async dispatch signature."""
+
+    async def shim(ti: dict, ctx: _ToolCtx) -> str:
+        return fn(ti, ctx)
+
+    return shim
+
+
+_TOOL_DISPATCH: dict[str, Callable[[dict, _ToolCtx], Awaitable[str]]] = {
+    "get_project_summary": lambda ti, ctx: _tool_get_project_summary(
+        ti.get("project_id", ctx.project_id), ctx.db
+    ),
+    "get_canvas_components": lambda ti, ctx: _tool_get_canvas_components(
+        ti.get("project_id", ctx.project_id), ti["canvas_id"], ctx.db
+    ),
+    "list_canvases": lambda ti, ctx: _tool_list_canvases(
+        ti.get("project_id", ctx.project_id), ctx.db
+    ),
+    "get_ideas": lambda ti, ctx: _tool_get_ideas(
+        ti.get("project_id", ctx.project_id), ctx.db, status=ti.get("status")
+    ),
+    "search_ideas": lambda ti, ctx: _tool_search_ideas(
+        ti.get("project_id", ctx.project_id),
+        ti["query"],
+        ctx.db,
+        hybrid=ti.get("hybrid", False),
+    ),
+    "get_scaffold_job": lambda ti, ctx: _tool_get_scaffold_job(
+        ti.get("project_id", ctx.project_id), ti["job_id"], ctx.db
+    ),
+    "get_deploy_config": lambda ti, ctx: _tool_get_deploy_config(
+        ti.get("project_id", ctx.project_id), ctx.db
+    ),
+    "get_knowledge_context": lambda ti, ctx: _tool_get_knowledge_context(
+        ti.get("project_slug", ctx.project_slug), ti["query"]
+    ),
+    "create_idea": lambda ti, ctx: _tool_create_idea(
+        ctx.project_id,
+        ctx.user_id,
+        ti["title"],
+        ti["description"],
+        ti.get("category"),
+        ctx.db,
+    ),
+    "push_to_recall": lambda ti, ctx: _tool_push_to_recall(
+        ctx.project_id, ctx.project_slug, ti.get("items", []), ctx.db
+    ),
+    "autopilot_status": _sync_tool(
+        lambda ti, ctx: _tool_autopilot_status(ti.get("work_dir"))
+    ),
+    "autopilot_read_spec": _sync_tool(
+        lambda ti, ctx: _tool_autopilot_read_spec(ti.get("work_dir"))
+    ),
+    "autopilot_read_progress": _sync_tool(
+        lambda ti, ctx: _tool_autopilot_read_progress(ti.get("work_dir"))
+    ),
+    "autopilot_read_log": _sync_tool(
+        lambda ti, ctx: _tool_autopilot_read_log(
+            ti.get("work_dir"), ti.get("tail_lines", 50)
+        )
+    ),
+}
 
 
 async def _execute_tool(
@@ -634,81 +855,55 @@ async def _execute_tool(
     db: AsyncSession,
 ) -> str:
     """Dispatch a tool call to the appropriate Python function."""
+    handler = _TOOL_DISPATCH.get(name)
+    if handler is None:
+        return _dumps({"error": f"Unknown tool: {name}"})
     try:
-        match name:
-            case "get_project_summary":
-                return await _tool_get_project_summary(
-                    tool_input.get("project_id", project_id), db
-                )
-            case "get_canvas_components":
-                return await _tool_get_canvas_components(
-                    tool_input.get("project_id", project_id),
-                    tool_input["canvas_id"],
-                    db,
-                )
-            case "list_canvases":
-                return await _tool_list_canvases(
-                    tool_input.get("project_id", project_id), db
-                )
-            case "get_ideas":
-                return await _tool_get_ideas(
-                    tool_input.get("project_id", project_id),
-                    db,
-                    status=tool_input.get("status"),
-                )
-            case "search_ideas":
-                return await _tool_search_ideas(
-                    tool_input.get("project_id", project_id),
-                    tool_input["query"],
-                    db,
-                )
-            case "get_scaffold_job":
-                return await _tool_get_scaffold_job(
-                    tool_input.get("project_id", project_id),
-                    tool_input["job_id"],
-                    db,
-                )
-            case "get_deploy_config":
-                return await _tool_get_deploy_config(
-                    tool_input.get("project_id", project_id), db
-                )
-            case "get_knowledge_context":
-                return await _tool_get_knowledge_context(
-                    tool_input.get("project_slug", project_slug),
-                    tool_input["query"],
-                )
-            case "create_idea":
-                return await _tool_create_idea(
-                    project_id,
-                    user_id,
-                    tool_input["title"],
-                    tool_input["description"],
-                    tool_input.get("category"),
-                    db,
-                )
-            case "push_to_recall":
-                return await _tool_push_to_recall(
-                    project_id,
-                    project_slug,
-                    tool_input.get("items", []),
-                    db,
-                )
-            case "autopilot_status":
-                return _tool_autopilot_status(tool_input.get("work_dir"))
-            case "autopilot_read_spec":
-                return _tool_autopilot_read_spec(tool_input.get("work_dir"))
-            case "autopilot_read_progress":
-                return _tool_autopilot_read_progress(tool_input.get("work_dir"))
-            case "autopilot_read_log":
-                return _tool_autopilot_read_log(
-                    tool_input.get("work_dir"),
-                    tool_input.get("tail_lines", 50),
-                )
-            case _:
-                return json.dumps({"error": f"Unknown tool: {name}"})
+        return await handler(
+            tool_input, _ToolCtx(project_id, project_slug, user_id, db)
+        )
     except Exception as e:
         logger.error("tool.execution_error", tool=name, error=str(e))
-        return json.dumps({"error": f"Tool execution failed: {str(e)}"})
+        return _dumps({"error": f"Tool execution failed: {str(e)}"})
+
+
+async def _run_tools(
+    blocks: list,
+    mcp_mgr,
+    project_id: str,
+    project_slug: str,
+    user_id: str,
+    db: AsyncSession,
+) -> list[str]:
+    """Execute one turn's tool_use blocks; results are returned in block order.
+
+    MCP calls run concurrently. Built-in tools share the request's AsyncSession,
+    which does not support concurrent use, so they run in order on one task
+    alongside the MCP calls.
+    """
+    results: list[str] = [""] * len(blocks)
+
+    async def run_mcp(i: int, block) -> None:
+        results[i] = await mcp_mgr.call_tool(block.name, block.input)
+
+    async def run_builtins(indexed: list) -> None:
+        for i, block in indexed:
+            results[i] = await _execute_tool(
+                block.name, block.input, project_id, project_slug, user_id, db
+            )
+
+    jobs = []
+    builtins = []
+    for i, block in enumerate(blocks):
+        if mcp_mgr.is_mcp_tool(block.name):
+            jobs.append(run_mcp(i, block))
+        else:
+            builtins.append((i, block))
+    if builtins:
+        jobs.append(run_builtins(builtins))
+
+    await asyncio.gather(*jobs)
+    return results
 
 
 # ── System prompt ──────────────────────────────────────────────────────────
@@ -718,7 +913,8 @@ async def _build_system_prompt(
     project_name: str,
     project_slug: str,
     project_id: str,
-) -> str:
+) -> tuple[str, bool]:
+    """Return (prompt, fetched); fetched is False when Recall could not be reached."""
     base = (
         f"You are the AI assistant for Codevv, a collaborative software design tool.\n"
         f"You have tools to query project data and knowledge memory.\n"
@@ -742,9 +938,9 @@ async def _build_system_prompt(
         if context:
             base += f"\n\n## Project Knowledge (from Recall):\n{context}"
     except Exception:
-        pass  # Recall down — proceed without context
+        return base, False  # Recall down — proceed without context
 
-    return base
+    return base, True
 
 
 # ── Conversation persistence helpers ──────────────────────────────────────
@@ -772,10 +968,26 @@ def _extract_tool_uses(content: list[dict] | str) -> str | None:
     return json.dumps(tools) if tools else None
 
 
-async def _load_conversation_messages(conv: Conversation) -> list[dict]:
-    """Rebuild Anthropic-format messages from persisted conversation."""
+async def _load_conversation_messages(
+    conversation_id: str, db: AsyncSession
+) -> list[dict]:
+    """Rebuild Anthropic-format messages from the conversation's most recent rows.
+
+    Only the window the cache keeps is read; older history stays in the DB.
+    Like _trim_history, the window starts on a user message, as the Messages
+    API requires.
+    """
+    result = await db.execute(
+        select(ConversationMessage)
+        .where(ConversationMessage.conversation_id == conversation_id)
+        .order_by(ConversationMessage.created_at.desc())
+        .limit(_CACHE_MAX_MESSAGES)
+    )
+    rows = result.scalars().all()[::-1]
+    start = next((i for i, msg in enumerate(rows) if msg.role == "user"), len(rows))
+
     messages: list[dict] = []
-    for msg in conv.messages:
+    for msg in rows[start:]:
         if msg.role == "user":
             messages.append({"role": "user", "content": msg.content})
         elif msg.role == "assistant":
@@ -799,25 +1011,112 @@ async def _load_conversation_messages(conv: Conversation) -> list[dict]:
     return messages
 
 
+def _trim_history(messages: list[dict], max_messages: int) -> None:
+    """Drop the oldest messages in place, keeping at most max_messages.
+
+    The kept window always starts on a plain user message so no tool_result is
+    separated from the tool_use it answers. Full history stays in the DB.
+    """
+    if len(messages) <= max_messages:
+        return
+    start = len(messages) - max_messages
+    while start < len(messages) and not (
+        messages[start]["role"] == "user" and isinstance(messages[start]["content"], str)
+    ):
+        start += 1
+    del messages[:start]
+
+
+# ── SSE framing ────────────────────────────────────────────────────────────
+
+# Text deltas are the bulk of the stream — frame them with a pre-encoded prefix
+_SSE_TEXT_PREFIX = b"event: text\ndata: "
+
+
+def _sse(event: str, data: dict) -> bytes:
+    """Encode one server-sent event frame."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def _sse_text(text: str) -> bytes:
+    return _SSE_TEXT_PREFIX + orjson.dumps({"text": text}) + b"\n\n"
+
+
+# Events buffered between the Anthropic stream and a slow SSE client
+_STREAM_QUEUE_SIZE = 128
+_STREAM_END = object()
+
+
 # ── Main service ───────────────────────────────────────────────────────────
 
+# Bounds for the in-memory conversation cache (DB remains the source of truth)
+_CACHE_MAX_CONVERSATIONS = 1024
+_CACHE_MAX_MESSAGES = 40
+
+# How long a project's system prompt (with its Recall context) is reused
+_SYSTEM_PROMPT_TTL = 300.0
+
 
 class ClaudeService:
     """Manages conversations and Anthropic API calls with SQLite persistence."""
 
     def __init__(self):
-        # In-memory cache: key -> {conversation_id, messages}
-        self._cache: dict[str, dict] = {}
+        # In-memory LRU cache: key -> {conversation_id, messages}
+        self._cache: OrderedDict[str, dict] = OrderedDict()
+        # project_id -> (built_at, project_name, project_slug, prompt)
+        self._system_prompt_cache: dict[str, tuple[float, str, str, str]] = {}
 
     def _key(self, user_id: str, project_id: str) -> str:
         return f"{user_id}:{project_id}"
 
+    def _cache_get(self, key: str) -> dict | None:
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+        return entry
+
+    def _cache_put(self, key: str, conversation_id: str, messages: list[dict]) -> None:
+        _trim_history(messages, _CACHE_MAX_MESSAGES)
+        self._cache[key] = {"conversation_id": conversation_id, "messages": messages}
+        self._cache.move_to_end(key)
+        while len(self._cache) > _CACHE_MAX_CONVERSATIONS:
+            self._cache.popitem(last=False)
+
+    async def _get_system_prompt(
+        self, project_name: str, project_slug: str, project_id: str
+    ) -> str:
+        """Return the project's system prompt, rebuilding it once the TTL expires."""
+        now = time.monotonic()
+        cached = self._system_prompt_cache.get(project_id)
+        if cached:
+            built_at, name, slug, prompt = cached
+            if now - built_at < _SYSTEM_PROMPT_TTL and (name, slug) == (
+                project_name,
+                project_slug,
+            ):
+                return prompt
+
+        prompt, fetched = await _build_system_prompt(project_name, project_slug, project_id)
+        # A prompt built without Recall context is not cached, so the next
+        # message retries Recall instead of going without knowledge for the TTL
+        if fetched:
+            self._system_prompt_cache[project_id] = (now, project_name, project_slug, prompt)
+        return prompt
+
+    def invalidate_system_prompts(self) -> None:
+        """Drop every cached prompt so the next chat refetches Recall context.
+
+        The prompt's Recall context query is not scoped to a domain, so a write
+        to any domain can change any project's prompt.
+        """
+        self._system_prompt_cache.clear()
+
     def get_history(self, user_id: str, project_id: str) -> list[dict]:
-        entry = self._cache.get(self._key(user_id, project_id))
+        entry = self._cache_get(self._key(user_id, project_id))
         return entry["messages"] if entry else []
 
     def get_conversation_id(self, user_id: str, project_id: str) -> str | None:
-        entry = self._cache.get(self._key(user_id, project_id))
+        entry = self._cache_get(self._key(user_id, project_id))
         return entry["conversation_id"] if entry else None
 
     async def clear_history(self, user_id: str, project_id: str) -> None:
@@ -839,18 +1138,14 @@ class ClaudeService:
                 Conversation.user_id == user_id,
                 Conversation.project_id == project_id,
             )
-            .options(selectinload(Conversation.messages))
+            .options(raiseload("*"))
         )
         conv = result.scalar_one_or_none()
         if not conv:
             return False
 
-        messages = await _load_conversation_messages(conv)
-        key = self._key(user_id, project_id)
-        self._cache[key] = {
-            "conversation_id": conv.id,
-            "messages": messages,
-        }
+        messages = await _load_conversation_messages(conv.id, db)
+        self._cache_put(self._key(user_id, project_id), conv.id, messages)
         return True
 
     async def _ensure_conversation(
@@ -863,9 +1158,10 @@ class ClaudeService:
     ) -> tuple[str, list[dict]]:
         """Get or create a conversation. Returns (conversation_id, messages)."""
         key = self._key(user_id, project_id)
-        entry = self._cache.get(key)
+        entry = self._cache_get(key)
 
         if entry:
+            _trim_history(entry["messages"], _CACHE_MAX_MESSAGES)
             return entry["conversation_id"], entry["messages"]
 
         # Try loading the most recent conversation from DB
@@ -876,13 +1172,13 @@ class ClaudeService:
             )
             .order_by(Conversation.updated_at.desc())
             .limit(1)
-            .options(selectinload(Conversation.messages))
+            .options(raiseload("*"))
         )
         conv = result.scalar_one_or_none()
 
         if conv:
-            messages = await _load_conversation_messages(conv)
-            self._cache[key] = {"conversation_id": conv.id, "messages": messages}
+            messages = await _load_conversation_messages(conv.id, db)
+            self._cache_put(key, conv.id, messages)
             return conv.id, messages
 
         # Create a new conversation
@@ -899,40 +1195,84 @@ class ClaudeService:
         await db.flush()
 
         messages: list[dict] = []
-        self._cache[key] = {"conversation_id": conv.id, "messages": messages}
+        self._cache_put(key, conv.id, messages)
         return conv.id, messages
 
-    async def _persist_message(
+    def _persist_message(
         self,
         conversation_id: str,
         role: str,
         content: list[dict] | str,
-        db: AsyncSession,
+        pending: list[dict],
+        tool_uses: list[dict] | None = None,
     ) -> None:
-        """Write a message to the DB and update conversation counters."""
-        text = _extract_text(content) if isinstance(content, (list,)) else content
-        tool_uses = (
-            _extract_tool_uses(content) if isinstance(content, (list,)) else None
-        )
+        """Buffer a message row; written by _flush_pending at the end of the turn.
+
+        Content may be blocks, or plain text already extracted by the caller
+        with its tool uses passed alongside.
+        """
+        if isinstance(content, list):
+            text = _extract_text(content)
+            tool_uses_json = _extract_tool_uses(content)
+        else:
+            text = content
+            tool_uses_json = json.dumps(tool_uses) if tool_uses else None
 
-        msg = ConversationMessage(
-            id=str(uuid.uuid4()),
-            conversation_id=conversation_id,
-            role=role,
-            content=text,
-            tool_uses_json=tool_uses,
+        pending.append(
+            {
+                "id": str(uuid.uuid4()),
+                "conversation_id": conversation_id,
+                "role": role,
+                "content": text,
+                "tool_uses_json": tool_uses_json,
+                "created_at": datetime.now(timezone.utc),
+            }
         )
-        db.add(msg)
 
-        # Update conversation metadata
-        result = await db.execute(
-            select(Conversation).where(Conversation.id == conversation_id)
+    async def _flush_pending(
+        self,
+        conversation_id: str,
+        pending: list[dict],
+        db: AsyncSession,
+    ) -> None:
+        """Write buffered messages in one executemany and update conversation counters."""
+        if not pending:
+            return
+        await db.execute(insert(ConversationMessage), pending)
+        await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(message_count=Conversation.message_count + len(pending))
         )
-        conv = result.scalar_one_or_none()
-        if conv:
-            conv.message_count = (conv.message_count or 0) + 1
+        pending.clear()
         await db.flush()
 
+    async def _flush_pending_after_error(
+        self,
+        conversation_id: str,
+        pending: list[dict],
+        db: AsyncSession,
+    ) -> None:
+        """Best-effort flush from an error handler; never raises.
+
+        The turn may have failed because the session itself is broken, in which
+        case the flush fails too — roll back so get_db finds a usable session.
+        """
+        try:
+            await self._flush_pending(conversation_id, pending, db)
+        except Exception as e:
+            logger.warning(
+                "claude.flush_after_error_failed",
+                conversation_id=conversation_id,
+                dropped=len(pending),
+                error=str(e),
+            )
+            pending.clear()
+            try:
+                await db.rollback()
+            except Exception as rollback_error:
+                logger.warning("claude.rollback_failed", error=str(rollback_error))
+
     async def start_new_conversation(
         self,
         user_id: str,
@@ -953,7 +1293,7 @@ class ClaudeService:
         db.add(conv)
         await db.flush()
 
-        self._cache[key] = {"conversation_id": conv.id, "messages": []}
+        self._cache_put(key, conv.id, [])
         return conv.id
 
     async def chat(
@@ -965,8 +1305,80 @@ class ClaudeService:
         message: str,
         model: str | None,
         db: AsyncSession,
-    ) -> AsyncIterator[dict]:
-        """Stream a chat response. Yields SSE-ready dicts."""
+    ) -> AsyncIterator[bytes]:
+        """Stream a chat response. Yields encoded SSE frames.
+
+        The turn loop runs in a producer task feeding a bounded queue, so a slow
+        client never holds more than _STREAM_QUEUE_SIZE events in memory. When
+        the client falls behind, queued text deltas are merged into one frame.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_STREAM_QUEUE_SIZE)
+
+        async def produce() -> None:
+            try:
+                async for item in self._chat_events(
+                    project_id,
+                    project_slug,
+                    project_name,
+                    user_id,
+                    message,
+                    model,
+                    db,
+                ):
+                    await queue.put(item)
+            except Exception:
+                await queue.put(_STREAM_END)
+                raise
+            # Not reached on cancellation: the consumer is gone and a put on a
+            # full queue would never return
+            await queue.put(_STREAM_END)
+
+        producer = asyncio.create_task(produce())
+        held = None
+        try:
+            while True:
+                item = held if held is not None else await queue.get()
+                held = None
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, bytes):
+                    yield item
+                    continue
+
+                parts = [item]
+                merged = 0
+                while not queue.empty():
+                    nxt = queue.get_nowait()
+                    if not isinstance(nxt, str):
+                        held = nxt
+                        break
+                    parts.append(nxt)
+                    merged += 1
+                if merged:
+                    logger.debug("chat.text_coalesced", deltas=merged + 1)
+                yield _sse_text("".join(parts))
+
+            # Surface anything the turn loop raised outside its own handlers
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+                # Wait for the turn loop to unwind so it is off the shared
+                # session before get_db commits or closes it
+                with contextlib.suppress(asyncio.CancelledError):
+                    await producer
+
+    async def _chat_events(
+        self,
+        project_id: str,
+        project_slug: str,
+        project_name: str,
+        user_id: str,
+        message: str,
+        model: str | None,
+        db: AsyncSession,
+    ) -> AsyncIterator[str | bytes]:
+        """Run the chat turn loop. Yields text deltas as str, other events as frames."""
         settings = get_settings()
 
         # Create client: prefer API key, fall back to OAuth token
@@ -993,18 +1405,19 @@ class ClaudeService:
             db,
         )
 
-        # Build system prompt (async — includes Recall context on first call)
-        system_prompt = await _build_system_prompt(
+        # Build system prompt (async — includes Recall context, cached per project)
+        system_prompt = await self._get_system_prompt(
             project_name, project_slug, project_id
         )
 
         # Build combined tool list: built-in + MCP
         mcp_mgr = get_mcp_manager()
-        all_tools = list(TOOLS) + mcp_mgr.get_all_anthropic_tools()
+        all_tools = mcp_mgr.get_tools_with(TOOLS)
 
-        # Append user message
+        # Append user message (rows are buffered and written once per turn)
+        pending: list[dict] = []
         messages.append({"role": "user", "content": message})
-        await self._persist_message(conversation_id, "user", message, db)
+        self._persist_message(conversation_id, "user", message, pending)
 
         max_turns = settings.claude_max_turns
         turn = 0
@@ -1028,21 +1441,23 @@ class ClaudeService:
                         if event.type == "content_block_start":
                             block = event.content_block
                             if block.type == "tool_use":
-                                yield {
-                                    "type": "tool_use_start",
-                                    "name": block.name,
-                                    "tool_use_id": block.id,
-                                }
+                                yield _sse(
+                                    "tool_use",
+                                    {"name": block.name, "status": "starting"},
+                                )
 
                         elif event.type == "content_block_delta":
                             delta = event.delta
                             if delta.type == "text_delta":
-                                yield {"type": "text", "text": delta.text}
+                                yield delta.text
 
                     # Get the final message
                     response = await stream.get_final_message()
 
-                # Build content blocks for history
+                # Build content blocks for history, collecting the row fields
+                # in the same pass
+                text_parts: list[str] = []
+                tool_uses: list[dict] = []
                 for block in response.content:
                     if block.type == "text":
                         collected_content.append(
@@ -1051,6 +1466,7 @@ class ClaudeService:
                                 "text": block.text,
                             }
                         )
+                        text_parts.append(block.text)
                     elif block.type == "tool_use":
                         collected_content.append(
                             {
@@ -1060,12 +1476,18 @@ class ClaudeService:
                                 "input": block.input,
                             }
                         )
+                        tool_uses.append({"name": block.name, "input": block.input})
 
                 # Append assistant message to history and persist
                 messages.append({"role": "assistant", "content": collected_content})
-                await self._persist_message(
-                    conversation_id, "assistant", collected_content, db
+                self._persist_message(
+                    conversation_id,
+                    "assistant",
+                    "\n".join(text_parts),
+                    pending,
+                    tool_uses,
                 )
+                await self._flush_pending(conversation_id, pending, db)
 
                 # If stop_reason is "end_turn", we're done
                 if response.stop_reason == "end_turn":
@@ -1073,44 +1495,32 @@ class ClaudeService:
 
                 # If stop_reason is "tool_use", execute tools and continue
                 if response.stop_reason == "tool_use":
-                    tool_results = []
-                    for block in response.content:
-                        if block.type == "tool_use":
-                            yield {
-                                "type": "tool_use",
-                                "name": block.name,
-                                "input": block.input,
-                            }
+                    tool_blocks = [
+                        block for block in response.content if block.type == "tool_use"
+                    ]
+                    for block in tool_blocks:
+                        yield _sse(
+                            "tool_use", {"name": block.name, "input": block.input}
+                        )
 
-                            logger.info(
-                                "tool.executing",
-                                tool=block.name,
-                                input_keys=list(block.input.keys()),
-                            )
-
-                            # Route: MCP tools vs built-in tools
-                            if mcp_mgr.is_mcp_tool(block.name):
-                                result = await mcp_mgr.call_tool(
-                                    block.name,
-                                    block.input,
-                                )
-                            else:
-                                result = await _execute_tool(
-                                    block.name,
-                                    block.input,
-                                    project_id,
-                                    project_slug,
-                                    user_id,
-                                    db,
-                                )
+                        logger.info(
+                            "tool.executing",
+                            tool=block.name,
+                            input_keys=list(block.input.keys()),
+                        )
 
-                            tool_results.append(
-                                {
-                                    "type": "tool_result",
-                                    "tool_use_id": block.id,
-                                    "content": result,
-                                }
-                            )
+                    # Route: MCP tools vs built-in tools (independent calls overlap)
+                    results = await _run_tools(
+                        tool_blocks, mcp_mgr, project_id, project_slug, user_id, db
+                    )
+                    tool_results = [
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": block.id,
+                            "content": result,
+                        }
+                        for block, result in zip(tool_blocks, results)
+                    ]
 
                     # Append tool results to messages
                     messages.append({"role": "user", "content": tool_results})
@@ -1119,37 +1529,40 @@ class ClaudeService:
                 # Any other stop reason — we're done
                 break
 
-            yield {
-                "type": "done",
-                "model": chosen_model,
-                "conversation_id": conversation_id,
-            }
+            yield _sse(
+                "done", {"model": chosen_model, "conversation_id": conversation_id}
+            )
 
         except anthropic.AuthenticationError as e:
             logger.error("claude.auth_error", error=str(e))
             # Remove the user message we just appended since the call failed
             if messages and messages[-1].get("role") == "user":
                 messages.pop()
-            yield {
-                "type": "error",
-                "message": "Authentication failed. Token may have expired — try refreshing.",
-            }
+            await self._flush_pending_after_error(conversation_id, pending, db)
+            yield _sse(
+                "error",
+                {
+                    "message": "Authentication failed. Token may have expired — try refreshing."
+                },
+            )
 
         except anthropic.RateLimitError as e:
             logger.warning("claude.rate_limit", error=str(e))
             if messages and messages[-1].get("role") == "user":
                 messages.pop()
-            yield {
-                "type": "error",
-                "message": "Rate limited. Please wait a moment and try again.",
-            }
+            await self._flush_pending_after_error(conversation_id, pending, db)
+            yield _sse(
+                "error",
+                {"message": "Rate limited. Please wait a moment and try again."},
+            )
 
         except Exception as e:
             logger.error("claude.error", error=str(e), error_type=type(e).__name__)
             # Clean up partial conversation state
             if messages and messages[-1].get("role") == "user":
                 messages.pop()
-            yield {"type": "error", "message": f"Claude API error: {str(e)}"}
+            await self._flush_pending_after_error(conversation_id, pending, db)
+            yield _sse("error", {"message": f"Claude API error: {str(e)}"})
 
 
 _service: ClaudeService | None = None
@@ -4,6 +4,11 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from app.models.canvas import Canvas
 
+try:
+    from yaml import CSafeDumper as _Dumper  # libyaml
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeDumper as _Dumper
+
 
 async def generate_compose_from_canvas(canvas_id: str, db: AsyncSession) -> str:
     result = await db.execute(
@@ -60,4 +65,4 @@ async def generate_compose_from_canvas(canvas_id: str, db: AsyncSession) -> str:
     if volumes:
         compose["volumes"] = volumes
 
-    return yaml.dump(compose, default_flow_style=False, sort_keys=False)
+    return yaml.dump(compose, Dumper=_Dumper, default_flow_style=False, sort_keys=False)
@@ -1,23 +1,55 @@
-import json
+import math
+from typing import TypeVar
+
 import httpx
 import numpy as np
+import orjson
 import structlog
 from app.core.config import get_settings
 
 settings = get_settings()
 logger = structlog.get_logger()
 
+T = TypeVar("T")
+
+# Shared client so calls to Ollama reuse keep-alive connections
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed several texts in one Ollama request. Raises on failure."""
+    if not texts:
+        return []
+    client = _get_client()
+    resp = await client.post(
+        f"{settings.ollama_url}/api/embed",
+        json={"model": settings.ollama_embed_model, "input": texts},
+    )
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    return data["embeddings"]
+
 
 async def get_embedding(text: str) -> list[float]:
     """Get embedding from Ollama. Raises on failure."""
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(
-            f"{settings.ollama_url}/api/embed",
-            json={"model": settings.ollama_embed_model, "input": text},
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        return data["embeddings"][0]
+    return (await get_embeddings([text]))[0]
 
 
 async def get_embedding_safe(text: str) -> list[float] | None:
@@ -29,21 +61,66 @@ async def get_embedding_safe(text: str) -> list[float] | None:
         return None
 
 
+def embedding_to_bytes(embedding) -> bytes:
+    """Pack an embedding as raw float32 for the DB (4 bytes per dimension)."""
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def embedding_from_bytes(blob: bytes | None) -> np.ndarray | None:
+    """Unpack a stored float32 embedding without per-element Python objects."""
+    if not blob:
+        return None
+    return np.frombuffer(blob, dtype=np.float32)
+
+
 def embedding_to_json(embedding: list[float]) -> str:
-    return json.dumps(embedding)
+    """Deprecated: embeddings are stored packed; use embedding_to_bytes."""
+    return orjson.dumps(embedding).decode()
 
 
-def embedding_from_json(text: str | None) -> list[float] | None:
+def embedding_from_json(text: str | bytes | None) -> list[float] | np.ndarray | None:
+    """Deprecated: use embedding_from_bytes. Accepts either storage format."""
     if not text:
         return None
-    return json.loads(text)
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        return embedding_from_bytes(bytes(text))
+    return orjson.loads(text)
 
 
 def cosine_similarity(a: list[float], b: list[float]) -> float:
-    a_arr = np.array(a, dtype=np.float32)
-    b_arr = np.array(b, dtype=np.float32)
-    dot = np.dot(a_arr, b_arr)
-    norm = np.linalg.norm(a_arr) * np.linalg.norm(b_arr)
-    if norm == 0:
+    """Cosine similarity of one pair. Ranking many vectors should use top_k_similar."""
+    a_arr = np.asarray(a, dtype=np.float32)
+    b_arr = np.asarray(b, dtype=np.float32)
+    # Three BLAS dots; np.linalg.norm's generic dispatch costs more than the math at D~1k
+    denom = float(np.dot(a_arr, a_arr)) * float(np.dot(b_arr, b_arr))
+    if denom == 0:
         return 0.0
-    return float(dot / norm)
+    return float(np.dot(a_arr, b_arr)) / math.sqrt(denom)
+
+
+def normalize(x) -> np.ndarray:
+    """L2-normalise a vector, or each row of a matrix, as float32."""
+    arr = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    return arr / np.where(norms == 0, 1.0, norms)
+
+
+def cosine_similarity_bulk(query, corpus: np.ndarray) -> np.ndarray:
+    """Cosine similarity of query against every row of a pre-normalised (N, D) corpus."""
+    return corpus @ normalize(query)
+
+
+def top_k_similar(query, candidates: list[tuple[T, np.ndarray | list[float]]], k: int) -> list[T]:
+    """Return the k candidate items most similar to query, best first.
+
+    Candidates are (item, embedding) pairs; embeddings whose dimension differs
+    from the query (e.g. from an older embedding model) are skipped.
+    """
+    dims = len(query)
+    pairs = [(item, emb) for item, emb in candidates if len(emb) == dims]
+    if not pairs:
+        return []
+    corpus = normalize(np.stack([np.asarray(emb, dtype=np.float32) for _, emb in pairs]))
+    sims = cosine_similarity_bulk(query, corpus)
+    order = np.argsort(-sims, kind="stable")[:k]
+    return [pairs[i][0] for i in order]
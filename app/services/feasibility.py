@@ -1,11 +1,63 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
 import structlog
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.idea import Idea
+from app.services.embedding import (
+    cosine_similarity_bulk,
+    embedding_from_bytes,
+    get_embedding_safe,
+    normalize,
+)
 from app.services.llm import llm_generate
 
 logger = structlog.get_logger()
 
+# Bulk imports enqueue one scoring job per idea. Ollama works through them one at a
+# time anyway, so cap in-flight requests rather than letting queued ones hit the timeout.
+_SCORING_CONCURRENCY = 2
+_scoring_slots = asyncio.Semaphore(_SCORING_CONCURRENCY)
+
+# Recent scores, keyed by a hash of the scored fields. A near-identical idea
+# (cosine >= _SEMANTIC_THRESHOLD) reuses the stored result instead of asking the LLM.
+_CACHE_MAX = 1024
+_SEMANTIC_THRESHOLD = 0.95
+_feasibility_cache: OrderedDict[str, tuple[float, str, np.ndarray | None]] = OrderedDict()
+
+
+def _cache_key(title: str, description: str, category: str) -> str:
+    return hashlib.sha256(f"{title}|{description}|{category}".encode()).hexdigest()
+
+
+def _semantic_lookup(vec: np.ndarray) -> tuple[float, str] | None:
+    """Return the cached score of the closest earlier idea above the threshold."""
+    entries = [
+        (key, emb)
+        for key, (_, _, emb) in _feasibility_cache.items()
+        if emb is not None and len(emb) == len(vec)
+    ]
+    if not entries:
+        return None
+    sims = cosine_similarity_bulk(vec, np.stack([emb for _, emb in entries]))
+    best = int(np.argmax(sims))
+    if sims[best] < _SEMANTIC_THRESHOLD:
+        return None
+    key = entries[best][0]
+    _feasibility_cache.move_to_end(key)
+    score, reason, _ = _feasibility_cache[key]
+    return score, reason
+
+
+def _cache_store(key: str, score: float, reason: str, vec: np.ndarray | None) -> None:
+    _feasibility_cache[key] = (score, reason, vec)
+    _feasibility_cache.move_to_end(key)
+    while len(_feasibility_cache) > _CACHE_MAX:
+        _feasibility_cache.popitem(last=False)
+
 
 async def score_idea_feasibility(idea_id: str, db: AsyncSession):
     result = await db.execute(select(Idea).where(Idea.id == idea_id))
@@ -13,11 +65,36 @@ async def score_idea_feasibility(idea_id: str, db: AsyncSession):
     if not idea:
         return
 
+    category = idea.category or "General"
+    key = _cache_key(idea.title, idea.description, category)
+    cached = _feasibility_cache.get(key)
+    if cached:
+        _feasibility_cache.move_to_end(key)
+        idea.feasibility_score, idea.feasibility_reason, _ = cached
+        await db.flush()
+        await db.commit()
+        return
+
+    # Prefer the embedding stored by the embed job; vectors are kept normalised
+    emb = embedding_from_bytes(idea.embedding)
+    if emb is None:
+        emb = await get_embedding_safe(f"{idea.title}\n{idea.description}")
+    vec = normalize(emb) if emb is not None else None
+    if vec is not None:
+        hit = _semantic_lookup(vec)
+        if hit:
+            logger.info("feasibility.semantic_cache_hit", idea_id=idea_id)
+            idea.feasibility_score, idea.feasibility_reason = hit
+            _cache_store(key, *hit, vec)
+            await db.flush()
+            await db.commit()
+            return
+
     prompt = f"""Evaluate the technical feasibility of this software idea:
 
 Title: {idea.title}
 Description: {idea.description}
-Category: {idea.category or "General"}
+Category: {category}
 
 Return JSON with:
 {{
@@ -28,9 +105,11 @@ Return JSON with:
 Consider: technical complexity, available tooling, time investment, and common pitfalls."""
 
     try:
-        result = await llm_generate(prompt, system="You are a senior software architect evaluating project feasibility.")
+        async with _scoring_slots:
+            result = await llm_generate(prompt, system="You are a senior software architect evaluating project feasibility.")
         idea.feasibility_score = float(result.get("score", 0.5))
         idea.feasibility_reason = result.get("reason", "No reason provided")
+        _cache_store(key, idea.feasibility_score, idea.feasibility_reason, vec)
     except Exception as e:
         logger.warning("feasibility.scoring_failed", idea_id=idea_id, error=str(e))
         idea.feasibility_score = None
@@ -1,9 +1,29 @@
 import httpx
-import json
+import orjson
 from app.core.config import get_settings
 
 settings = get_settings()
 
+# Shared client so calls to Ollama reuse keep-alive connections
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=180.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 async def llm_generate(prompt: str, system: str = "", format_json: bool = True) -> dict | str:
     payload = {
@@ -18,12 +38,12 @@ async def llm_generate(prompt: str, system: str = "", format_json: bool = True)
     if format_json:
         payload["format"] = "json"
 
-    async with httpx.AsyncClient(timeout=180.0) as client:
-        resp = await client.post(f"{settings.ollama_url}/api/generate", json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-        response_text = data.get("response", "")
+    client = _get_client()
+    resp = await client.post(f"{settings.ollama_url}/api/generate", json=payload)
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    response_text = data.get("response", "")
 
     if format_json:
-        return json.loads(response_text)
+        return orjson.loads(response_text)
     return response_text
@@ -4,31 +4,55 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
-import json
 import os
 from pathlib import Path
 from typing import Any
 
+import orjson
 import structlog
 from mcp import ClientSession
 from mcp.client.stdio import StdioServerParameters, stdio_client
 
 logger = structlog.get_logger()
 
+
+def _error(message: str) -> str:
+    """Encode a tool error result."""
+    return orjson.dumps({"error": message}).decode()
+
+
 # Path to Claude's global config
 _CLAUDE_CONFIG = Path.home() / ".claude.json"
 
 
+# ((mtime_ns, size), servers) from the last parse. ~/.claude.json also holds
+# Claude's per-project history, so it can be large and is only reparsed on change.
+_config_cache: tuple[tuple[int, int], dict[str, dict]] | None = None
+
+
 def _load_mcp_configs() -> dict[str, dict]:
-    """Read MCP server configs from ~/.claude.json."""
-    if not _CLAUDE_CONFIG.exists():
+    """Read MCP server configs from ~/.claude.json, cached by mtime."""
+    global _config_cache
+    try:
+        st = _CLAUDE_CONFIG.stat()
+    except FileNotFoundError:
         return {}
+    except OSError as e:
+        logger.warning("mcp.config_read_error", error=str(e))
+        return {}
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _config_cache and _config_cache[0] == stamp:
+        return _config_cache[1]
+
     try:
-        data = json.loads(_CLAUDE_CONFIG.read_text(encoding="utf-8"))
-        return data.get("mcpServers", {})
-    except (json.JSONDecodeError, OSError) as e:
+        data = orjson.loads(_CLAUDE_CONFIG.read_bytes())
+    except (orjson.JSONDecodeError, OSError) as e:
         logger.warning("mcp.config_read_error", error=str(e))
         return {}
+    servers = data.get("mcpServers", {})
+    _config_cache = (stamp, servers)
+    return servers
 
 
 class MCPConnection:
@@ -40,9 +64,15 @@ class MCPConnection:
         self.session: ClientSession | None = None
         self.tools: list[dict] = []  # Raw MCP tool definitions
         self.anthropic_tools: list[dict] = []  # Anthropic API format
+        self._name_map: dict[str, str] = {}  # namespaced name -> raw tool name
         self.status: str = "disconnected"
         self.error: str | None = None
-        self._exit_stack: contextlib.AsyncExitStack | None = None
+        # stdio_client and ClientSession hold anyio cancel scopes, which must be
+        # exited by the task that entered them. One task owns the connection
+        # from open to close; connect/disconnect only start and signal it.
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
 
     async def connect(self) -> None:
         """Connect to this MCP server subprocess."""
@@ -51,110 +81,129 @@ class MCPConnection:
 
         self.status = "connecting"
         self.error = None
-        self._exit_stack = contextlib.AsyncExitStack()
-
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name=f"mcp:{self.name}")
+        try:
+            await self._ready.wait()
+        except asyncio.CancelledError:
+            # The owner task closes the connection itself once it sees the stop
+            self._stop.set()
+            raise
+        if self.status != "connected":
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        """Open the connection, hold it until disconnect() signals, then close it."""
         try:
-            # Build environment — inherit current env + server-specific vars
-            env = dict(os.environ)
-            if server_env := self.config.get("env"):
-                env.update(server_env)
-
-            params = StdioServerParameters(
-                command=self.config["command"],
-                args=self.config.get("args", []),
-                env=env,
-            )
-
-            read, write = await self._exit_stack.enter_async_context(
-                stdio_client(params)
-            )
-            self.session = await self._exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-            await self.session.initialize()
-
-            # Discover tools
-            tools_result = await self.session.list_tools()
-            self.tools = []
-            self.anthropic_tools = []
-
-            for tool in tools_result.tools:
-                raw_schema = (
-                    tool.inputSchema
-                    if isinstance(tool.inputSchema, dict)
-                    else tool.inputSchema.model_dump()
-                    if hasattr(tool.inputSchema, "model_dump")
-                    else {"type": "object", "properties": {}}
+            async with contextlib.AsyncExitStack() as stack:
+                # Build environment — inherit current env + server-specific vars
+                env = dict(os.environ)
+                if server_env := self.config.get("env"):
+                    env.update(server_env)
+
+                params = StdioServerParameters(
+                    command=self.config["command"],
+                    args=self.config.get("args", []),
+                    env=env,
                 )
-                self.tools.append({
-                    "name": tool.name,
-                    "description": tool.description or "",
-                    "input_schema": raw_schema,
-                })
-                # Anthropic API format with namespaced name
-                self.anthropic_tools.append({
-                    "name": f"mcp__{self.name}__{tool.name}",
-                    "description": f"[{self.name}] {tool.description or tool.name}",
-                    "input_schema": raw_schema,
-                })
-
-            self.status = "connected"
-            logger.info(
-                "mcp.connected",
-                server=self.name,
-                tool_count=len(self.tools),
-            )
+
+                read, write = await stack.enter_async_context(stdio_client(params))
+                self.session = await stack.enter_async_context(ClientSession(read, write))
+                await self.session.initialize()
+
+                # Discover tools
+                tools_result = await self.session.list_tools()
+                self.tools = []
+                self.anthropic_tools = []
+                self._name_map = {}
+
+                for tool in tools_result.tools:
+                    raw_schema = (
+                        tool.inputSchema
+                        if isinstance(tool.inputSchema, dict)
+                        else tool.inputSchema.model_dump()
+                        if hasattr(tool.inputSchema, "model_dump")
+                        else {"type": "object", "properties": {}}
+                    )
+                    self.tools.append({
+                        "name": tool.name,
+                        "description": tool.description or "",
+                        "input_schema": raw_schema,
+                    })
+                    # Anthropic API format with namespaced name
+                    namespaced = f"mcp__{self.name}__{tool.name}"
+                    self._name_map[namespaced] = tool.name
+                    self.anthropic_tools.append({
+                        "name": namespaced,
+                        "description": f"[{self.name}] {tool.description or tool.name}",
+                        "input_schema": raw_schema,
+                    })
+
+                self.status = "connected"
+                logger.info(
+                    "mcp.connected",
+                    server=self.name,
+                    tool_count=len(self.tools),
+                )
+                self._ready.set()
+                await self._stop.wait()
 
         except Exception as e:
-            self.status = "failed"
-            self.error = str(e)
-            logger.error("mcp.connect_failed", server=self.name, error=str(e))
-            if self._exit_stack:
-                try:
-                    await self._exit_stack.aclose()
-                except Exception:
-                    pass
-                self._exit_stack = None
+            if self.status == "connected":
+                logger.warning("mcp.disconnect_error", server=self.name, error=str(e))
+            else:
+                self.status = "failed"
+                self.error = str(e)
+                logger.error("mcp.connect_failed", server=self.name, error=str(e))
+        finally:
+            self.session = None
+            if self.status == "connected":
+                # Closed by disconnect(), or the server went away on its own
+                self.status = "disconnected"
+            self._ready.set()
 
     async def disconnect(self) -> None:
         """Disconnect from this MCP server."""
-        if self._exit_stack:
-            try:
-                await self._exit_stack.aclose()
-            except Exception as e:
-                logger.warning("mcp.disconnect_error", server=self.name, error=str(e))
-            self._exit_stack = None
+        if self._task:
+            self._stop.set()
+            await self._task
+            self._task = None
         self.session = None
         self.tools = []
         self.anthropic_tools = []
+        self._name_map = {}
         self.status = "disconnected"
         logger.info("mcp.disconnected", server=self.name)
 
     async def call_tool(self, tool_name: str, arguments: dict) -> str:
         """Execute a tool on this MCP server. Returns string result."""
         if not self.session or self.status != "connected":
-            return json.dumps({"error": f"Not connected to MCP server '{self.name}'"})
+            return _error(f"Not connected to MCP server '{self.name}'")
 
         try:
             result = await self.session.call_tool(tool_name, arguments)
             # Convert MCP content blocks to a single string
             parts = []
             for content in result.content:
-                if hasattr(content, "text"):
-                    parts.append(content.text)
+                # One attribute probe per block; text is by far the common case
+                text = getattr(content, "text", None)
+                if text is not None:
+                    parts.append(text)
                 elif hasattr(content, "data"):
                     parts.append(f"[Binary data: {getattr(content, 'mimeType', 'unknown')}]")
                 else:
                     parts.append(str(content))
 
-            output = "\n".join(parts)
+            output = parts[0] if len(parts) == 1 else "\n".join(parts)
             if result.isError:
-                return json.dumps({"error": output})
+                return _error(output)
             return output
 
         except Exception as e:
             logger.error("mcp.tool_error", server=self.name, tool=tool_name, error=str(e))
-            return json.dumps({"error": f"MCP tool execution failed: {str(e)}"})
+            return _error(f"MCP tool execution failed: {str(e)}")
 
 
 class MCPManager:
@@ -164,6 +213,21 @@ class MCPManager:
         self._configs: dict[str, dict] = {}
         self._connections: dict[str, MCPConnection] = {}
         self._enabled_servers: set[str] = set()
+        # namespaced tool name -> (connection, raw tool name); rebuilt on connect/disconnect
+        self._tool_index: dict[str, tuple[MCPConnection, str]] = {}
+        # Anthropic-format tool lists, rebuilt alongside the index
+        self._anthropic_tools: list[dict] = []
+        self._combined_tools: tuple[list[dict], list[dict]] | None = None
+
+    def _rebuild_tool_index(self) -> None:
+        connected = [c for c in self._connections.values() if c.status == "connected"]
+        self._tool_index = {
+            namespaced: (conn, raw)
+            for conn in connected
+            for namespaced, raw in conn._name_map.items()
+        }
+        self._anthropic_tools = [t for conn in connected for t in conn.anthropic_tools]
+        self._combined_tools = None
 
     def load_configs(self) -> dict[str, dict]:
         """Load/refresh MCP server configs from ~/.claude.json."""
@@ -216,6 +280,7 @@ class MCPManager:
 
         if conn.status == "connected":
             self._enabled_servers.add(name)
+        self._rebuild_tool_index()
 
         return {
             "name": name,
@@ -225,39 +290,46 @@ class MCPManager:
             "tools": [t["name"] for t in conn.tools],
         }
 
+    async def connect_all(self, names: list[str]) -> list[dict | BaseException]:
+        """Connect several servers concurrently; startup takes the slowest, not the sum.
+
+        Each connection runs in its own long-lived task, so it can later be
+        closed from any task (e.g. the lifespan shutdown).
+        """
+        return await asyncio.gather(
+            *(self.connect_server(n) for n in names), return_exceptions=True
+        )
+
     async def disconnect_server(self, name: str) -> None:
         """Disconnect from a specific MCP server."""
         if name in self._connections:
             await self._connections[name].disconnect()
             del self._connections[name]
         self._enabled_servers.discard(name)
+        self._rebuild_tool_index()
 
     def get_all_anthropic_tools(self) -> list[dict]:
-        """Get all connected MCP tools in Anthropic API tool format."""
-        tools = []
-        for conn in self._connections.values():
-            if conn.status == "connected":
-                tools.extend(conn.anthropic_tools)
-        return tools
+        """Get all connected MCP tools in Anthropic API tool format (do not mutate)."""
+        return self._anthropic_tools
+
+    def get_tools_with(self, builtin: list[dict]) -> list[dict]:
+        """Return builtin + MCP tools, rebuilt only when the connected set changes."""
+        cached = self._combined_tools
+        if cached is None or cached[0] is not builtin:
+            cached = self._combined_tools = (builtin, builtin + self._anthropic_tools)
+        return cached[1]
 
     def is_mcp_tool(self, tool_name: str) -> bool:
-        """Check if a tool name is an MCP tool (has mcp__ prefix)."""
-        return tool_name.startswith("mcp__")
+        """Check if a tool name belongs to a connected MCP server."""
+        return tool_name in self._tool_index
 
     async def call_tool(self, namespaced_name: str, arguments: dict) -> str:
         """Call a tool by its namespaced name (mcp__{server}__{tool})."""
-        # Parse the namespaced name
-        parts = namespaced_name.split("__", 2)
-        if len(parts) != 3 or parts[0] != "mcp":
-            return json.dumps({"error": f"Invalid MCP tool name: {namespaced_name}"})
-
-        server_name = parts[1]
-        tool_name = parts[2]
-
-        conn = self._connections.get(server_name)
-        if not conn:
-            return json.dumps({"error": f"MCP server '{server_name}' is not connected"})
+        entry = self._tool_index.get(namespaced_name)
+        if entry is None:
+            return _error(f"MCP tool '{namespaced_name}' is not available")
 
+        conn, tool_name = entry
         return await conn.call_tool(tool_name, arguments)
 
     async def shutdown(self) -> None:
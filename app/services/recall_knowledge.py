@@ -2,6 +2,12 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
+from collections import OrderedDict
+from itertools import chain, islice
+from typing import Sequence
+
 import structlog
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,11 +17,38 @@ from app.models.knowledge import KnowledgeEntity, KnowledgeRelation
 
 logger = structlog.get_logger()
 
+# Rows streamed and stored concurrently per migration batch (one RTT per batch, not per row)
+_MIGRATE_BATCH = 100
+# In-flight Recall calls, kept under the Recall client's connection pool
+_STORE_CONCURRENCY = 64
+_RELATION_CONCURRENCY = 32
+# Failures included in the one summary warning each migration logs per kind
+_FAILURE_SAMPLE = 20
+
+# Search results reused for repeated queries (tab switches, re-opened panels).
+# Writes bump the domain's generation, so older entries stop matching at once.
+_SEARCH_TTL = 60.0
+_SEARCH_CACHE_MAX = 1024
+_search_cache: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+_domain_generation: dict[str, int] = {}
+
 
 def _domain(project_slug: str) -> str:
     return f"codevv:{project_slug}"
 
 
+def invalidate_search_cache(domain: str) -> None:
+    """Drop cached searches for a Recall domain after a write to it.
+
+    Cached chat system prompts embed Recall context too, so they are dropped
+    alongside.
+    """
+    from app.services.claude_service import get_claude_service
+
+    _domain_generation[domain] = _domain_generation.get(domain, 0) + 1
+    get_claude_service().invalidate_system_prompts()
+
+
 async def store_knowledge(
     project_slug: str,
     name: str,
@@ -25,37 +58,61 @@ async def store_knowledge(
 ) -> dict:
     """Store a knowledge entity in Recall."""
     recall = get_recall_client()
-    content = name
-    if description:
-        content = f"{name}: {description}"
+    content = f"{name}: {description}" if description else name
 
-    tags = [entity_type]
-    if metadata:
-        tags.extend(str(v) for v in metadata.values() if isinstance(v, str))
+    # Stop reading metadata once the 10-tag cap is reached
+    extra = (v for v in (metadata or {}).values() if isinstance(v, str))
+    tags = list(islice(chain((entity_type,), extra), 10))
 
     result = await recall.store(
         content=content,
         memory_type="semantic",
         domain=_domain(project_slug),
         importance=0.6,
-        tags=tags[:10],
+        tags=tags,
+        meta={"name": name, "entity_type": entity_type},
     )
+    invalidate_search_cache(_domain(project_slug))
     return result
 
 
 async def search_knowledge(
     project_slug: str, query: str, limit: int = 20
 ) -> list[dict]:
-    """Search knowledge entities in Recall."""
+    """Search knowledge entities in Recall, reusing results for up to _SEARCH_TTL."""
+    domain = _domain(project_slug)
+    key = (domain, _domain_generation.get(domain, 0), query.strip().lower(), limit)
+    now = time.monotonic()
+    cached = _search_cache.get(key)
+    if cached and now - cached[0] < _SEARCH_TTL:
+        _search_cache.move_to_end(key)
+        return cached[1]
+
     recall = get_recall_client()
     results = await recall.search(
         query=query,
-        domain=_domain(project_slug),
+        domain=domain,
         limit=limit,
     )
+    _search_cache[key] = (now, results)
+    _search_cache.move_to_end(key)
+    while len(_search_cache) > _SEARCH_CACHE_MAX:
+        _search_cache.popitem(last=False)
     return results
 
 
+async def search_knowledge_batch(
+    project_slug: str, queries: list[str], limit: int = 20
+) -> list[list[dict]]:
+    """Run several searches concurrently. Results are returned in query order."""
+    unique = list(dict.fromkeys(queries))
+    results = await asyncio.gather(
+        *(search_knowledge(project_slug, q, limit) for q in unique)
+    )
+    by_query = dict(zip(unique, results))
+    return [by_query[q] for q in queries]
+
+
 async def get_knowledge_graph(project_slug: str) -> dict:
     """Return {nodes, edges} for D3 visualization from Recall data."""
     recall = get_recall_client()
@@ -65,113 +122,193 @@ async def get_knowledge_graph(project_slug: str) -> dict:
         limit=100,
     )
 
-    nodes = []
-    node_ids = set()
+    nodes: dict[str, dict] = {}  # id -> node; first occurrence wins
+    pending_edges = []  # (source, relationships); targets checked once all nodes are known
     for mem in results:
         mid = mem.get("id", "")
-        if mid in node_ids:
+        related = mem.get("relationships")
+        if related:
+            pending_edges.append((mid, related))
+        if mid in nodes:
             continue
-        node_ids.add(mid)
-
-        # Parse entity_type from tags
-        tags = mem.get("tags", [])
-        entity_type = tags[0] if tags else "concept"
-
-        # Parse name from content (before the colon if present)
-        content = mem.get("content", "")
-        name = content.split(":")[0].strip() if ":" in content else content[:60]
-
-        nodes.append(
-            {
-                "id": mid,
-                "name": name,
-                "entity_type": entity_type,
-                "depth": 0,
-            }
-        )
 
-    # Build edges from Recall relationships
-    edges = []
-    for mem in results:
-        mid = mem.get("id", "")
-        related = mem.get("relationships", [])
-        for rel in related:
-            target_id = rel.get("target_id", "")
-            if target_id in node_ids:
-                edges.append(
-                    {
-                        "source": mid,
-                        "target": target_id,
-                        "relation_type": rel.get("relationship_type", "relates_to"),
-                        "weight": rel.get("strength", 1.0),
-                    }
-                )
-
-    return {"nodes": nodes, "edges": edges}
+        meta = mem.get("meta")
+        if meta:
+            name = meta.get("name") or mem.get("content", "")[:60]
+            entity_type = meta.get("entity_type", "concept")
+        else:
+            # Memories stored before meta existed: name is the content up to the
+            # colon, entity_type the first tag
+            tags = mem.get("tags", [])
+            entity_type = tags[0] if tags else "concept"
+            content = mem.get("content", "")
+            name = content.split(":")[0].strip() if ":" in content else content[:60]
 
+        nodes[mid] = {
+            "id": mid,
+            "name": name,
+            "entity_type": entity_type,
+            "depth": 0,
+        }
 
-async def migrate_project_knowledge(
-    db: AsyncSession, project_id: str, project_slug: str
-) -> dict:
-    """One-time migration from SQLite knowledge to Recall."""
-    recall = get_recall_client()
-    domain = _domain(project_slug)
+    # Build edges from Recall relationships
+    edges = [
+        {
+            "source": mid,
+            "target": rel.get("target_id", ""),
+            "relation_type": rel.get("relationship_type", "relates_to"),
+            "weight": rel.get("strength", 1.0),
+        }
+        for mid, related in pending_edges
+        for rel in related
+        if rel.get("target_id", "") in nodes
+    ]
 
-    # Load all entities
-    result = await db.execute(
-        select(KnowledgeEntity).where(KnowledgeEntity.project_id == project_id)
-    )
-    entities = result.scalars().all()
+    return {"nodes": list(nodes.values()), "edges": edges}
 
-    # Load all relations
-    result = await db.execute(
-        select(KnowledgeRelation).where(KnowledgeRelation.project_id == project_id)
-    )
-    relations = result.scalars().all()
 
-    migrated_entities = 0
-    migrated_relations = 0
-    entity_id_map: dict[str, str] = {}  # old_id -> recall_id
+def _entity_payload(entity: KnowledgeEntity) -> tuple[str, str, str, list[str], dict]:
+    """(old_id, name, content, tags, meta) read off the ORM row in one pass."""
+    content = f"{entity.name}: {entity.description}" if entity.description else entity.name
+    tags = [entity.entity_type, entity.path] if entity.path else [entity.entity_type]
+    meta = {"name": entity.name, "entity_type": entity.entity_type}
+    return entity.id, entity.name, content, tags, meta
+
 
-    for entity in entities:
-        content = entity.name
-        if entity.description:
-            content = f"{entity.name}: {entity.description}"
+async def _bulk_store(
+    recall,
+    entities: Sequence[KnowledgeEntity],
+    domain: str,
+    entity_id_map: dict[str, str],
+    failures: list[dict],
+    sem: asyncio.Semaphore,
+) -> None:
+    """Store one batch of entities concurrently.
 
-        tags = [entity.entity_type]
-        if entity.path:
-            tags.append(entity.path)
+    Successes are recorded as {old_id: recall_id}; failures are appended to
+    *failures* for the caller to log once.
+    """
+    payloads = [_entity_payload(e) for e in entities]
 
-        try:
-            stored = await recall.store(
+    async def store_one(content: str, tags: list[str], meta: dict) -> dict:
+        async with sem:
+            return await recall.store(
                 content=content,
                 memory_type="semantic",
                 domain=domain,
                 importance=0.6,
                 tags=tags[:10],
+                meta=meta,
             )
-            recall_id = stored.get("id", "")
-            entity_id_map[entity.id] = recall_id
-            migrated_entities += 1
-        except Exception as e:
-            logger.warning("migrate.entity_failed", name=entity.name, error=str(e))
-
-    for relation in relations:
-        source_recall = entity_id_map.get(relation.source_id)
-        target_recall = entity_id_map.get(relation.target_id)
-        if not source_recall or not target_recall:
+
+    results = await asyncio.gather(
+        *(store_one(content, tags, meta) for _, _, content, tags, meta in payloads),
+        return_exceptions=True,
+    )
+    for (old_id, name, *_), stored in zip(payloads, results):
+        if isinstance(stored, Exception):
+            failures.append({"name": name, "error": str(stored)})
             continue
+        entity_id_map[old_id] = stored.get("id", "")
 
-        try:
-            await recall.create_relationship(
+
+async def migrate_project_knowledge(
+    db: AsyncSession, project_id: str, project_slug: str
+) -> dict:
+    """One-time migration from SQLite knowledge to Recall.
+
+    Rows are streamed in batch-sized partitions and sent to Recall as they
+    arrive, so memory stays flat however large the project is.
+    """
+    # Relations only link entities, so a project without entities has nothing to move
+    has_entities = await db.scalar(
+        select(1)
+        .select_from(KnowledgeEntity)
+        .where(KnowledgeEntity.project_id == project_id)
+        .limit(1)
+    )
+    if has_entities is None:
+        return {
+            "migrated_entities": 0,
+            "migrated_relations": 0,
+            "total_entities": 0,
+            "total_relations": 0,
+        }
+
+    recall = get_recall_client()
+    domain = _domain(project_slug)
+
+    # Stream entities straight into Recall batches
+    entity_id_map: dict[str, str] = {}  # old_id -> recall_id
+    entity_failures: list[dict] = []
+    total_entities = 0
+    store_sem = asyncio.Semaphore(_STORE_CONCURRENCY)
+    entity_stream = await db.stream_scalars(
+        select(KnowledgeEntity)
+        .where(KnowledgeEntity.project_id == project_id)
+        .execution_options(yield_per=_MIGRATE_BATCH)
+    )
+    async for chunk in entity_stream.partitions():
+        total_entities += len(chunk)
+        await _bulk_store(recall, chunk, domain, entity_id_map, entity_failures, store_sem)
+    migrated_entities = len(entity_id_map)
+    invalidate_search_cache(domain)
+    if entity_failures:
+        logger.warning(
+            "migrate.entity_failed_batch",
+            count=len(entity_failures),
+            sample=entity_failures[:_FAILURE_SAMPLE],
+        )
+
+    sem = asyncio.Semaphore(_RELATION_CONCURRENCY)
+
+    async def _one(source_recall: str, target_recall: str, relation) -> dict:
+        async with sem:
+            return await recall.create_relationship(
                 source_id=source_recall,
                 target_id=target_recall,
                 rel_type=relation.relation_type,
                 strength=relation.weight or 0.5,
             )
-            migrated_relations += 1
-        except Exception as e:
-            logger.warning("migrate.relation_failed", error=str(e))
+
+    # Relations need the full id map, so they stream once all entities are stored
+    total_relations = 0
+    migrated_relations = 0
+    relation_failures: list[dict] = []
+    relation_stream = await db.stream_scalars(
+        select(KnowledgeRelation)
+        .where(KnowledgeRelation.project_id == project_id)
+        .execution_options(yield_per=_MIGRATE_BATCH)
+    )
+    async for chunk in relation_stream.partitions():
+        total_relations += len(chunk)
+        sent = []
+        coros = []
+        for relation in chunk:
+            source_recall = entity_id_map.get(relation.source_id)
+            target_recall = entity_id_map.get(relation.target_id)
+            if not source_recall or not target_recall:
+                continue
+            sent.append(relation)
+            coros.append(_one(source_recall, target_recall, relation))
+
+        outcomes = await asyncio.gather(*coros, return_exceptions=True)
+        for relation, outcome in zip(sent, outcomes):
+            if isinstance(outcome, Exception):
+                relation_failures.append({
+                    "source_id": relation.source_id,
+                    "target_id": relation.target_id,
+                    "error": str(outcome),
+                })
+            else:
+                migrated_relations += 1
+
+    if relation_failures:
+        logger.warning(
+            "migrate.relation_failed_batch",
+            count=len(relation_failures),
+            sample=relation_failures[:_FAILURE_SAMPLE],
+        )
 
     logger.info(
         "migrate.complete",
@@ -182,6 +319,6 @@ async def migrate_project_knowledge(
     return {
         "migrated_entities": migrated_entities,
         "migrated_relations": migrated_relations,
-        "total_entities": len(entities),
-        "total_relations": len(relations),
+        "total_entities": total_entities,
+        "total_relations": total_relations,
     }
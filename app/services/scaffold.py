@@ -1,12 +1,20 @@
-import json
+import asyncio
+import shutil
 import uuid
+import orjson
+import structlog
 from datetime import datetime, timezone
+from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from app.core.config import get_data_dir
+from app.core.database import async_session
 from app.models.canvas import CanvasComponent
 from app.models.scaffold import ScaffoldJob
 from app.services.llm import llm_generate
-from jinja2 import Environment, BaseLoader
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+
+logger = structlog.get_logger()
 
 TEMPLATES = {
     "fastapi_service": '''"""{{ name }} - FastAPI Service"""
@@ -68,25 +76,267 @@ CMD {{ cmd }}
 ''',
 }
 
-jinja_env = Environment(loader=BaseLoader(), autoescape=False)
+def _bytecode_cache() -> FileSystemBytecodeCache | None:
+    """Persist compiled templates so restarts load bytecode instead of re-parsing."""
+    cache_dir = get_data_dir() / "jinja_cache"
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.warning("scaffold.jinja_cache_unavailable", path=str(cache_dir), error=str(e))
+        return None
+    return FileSystemBytecodeCache(str(cache_dir))
+
+
+_jinja_env: Environment | None = None
+
+
+def get_jinja_env() -> Environment:
+    """Template environment, created on first Jinja render so importing touches no disk.
+
+    Templates are loaded by name so the bytecode cache applies; from_string()
+    templates bypass it. Jinja checks the source checksum, so edits recompile.
+    Each template is compiled once and then served from the environment's cache.
+    """
+    global _jinja_env
+    if _jinja_env is None:
+        _jinja_env = Environment(
+            loader=DictLoader(TEMPLATES),
+            autoescape=False,
+            auto_reload=False,  # TEMPLATES never change at runtime
+            bytecode_cache=_bytecode_cache(),
+        )
+    return _jinja_env
+
+
+# ── Fast renderers ──────────────────────────────────────────────────────────
+# String builders producing exactly what the Jinja templates above render, for
+# the dict/list shapes the LLM spec uses. Anything else raises _Unsupported and
+# falls back to Jinja. Keep these in step with TEMPLATES.
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _str(obj, key: str) -> str:
+    """{{ obj.key }}: missing renders empty, like Jinja's Undefined."""
+    if not isinstance(obj, dict):
+        raise _Unsupported
+    return str(obj[key]) if key in obj else ""
+
+
+def _get(obj, key: str):
+    """Value for {% if obj.key %}; missing is falsy."""
+    if not isinstance(obj, dict):
+        raise _Unsupported
+    return obj.get(key)
+
+
+def _list(obj, key: str) -> list:
+    """{% for x in obj.key %}: missing iterates nothing."""
+    if not isinstance(obj, dict):
+        raise _Unsupported
+    items = obj.get(key, [])
+    if not isinstance(items, list):
+        raise _Unsupported
+    return items
+
+
+def _render_fastapi_service(ctx: dict) -> str:
+    name = _str(ctx, "name")
+    parts = [
+        f'"""{name} - FastAPI Service"""\n'
+        "from fastapi import FastAPI\n"
+        "from pydantic import BaseModel\n"
+        "import uvicorn\n"
+        "\n"
+        f'app = FastAPI(title="{name}")\n'
+        "\n"
+    ]
+    for model in _list(ctx, "models"):
+        parts.append(f"\nclass {_str(model, 'name')}(BaseModel):\n")
+        for field in _list(model, "fields"):
+            line = f"\n    {_str(field, 'name')}: {_str(field, 'type')}"
+            default = _get(field, "default")
+            if default:
+                line += f" = {default}"
+            parts.append(line + "\n\n")
+        parts.append("\n\n")
+    parts.append("\n")
+    for endpoint in _list(ctx, "endpoints"):
+        body = _get(endpoint, "body")
+        method = _str(endpoint, "method")
+        path = _str(endpoint, "path")
+        description = _str(endpoint, "description")
+        parts.append(
+            f'\n@app.{method}("{path}")\n'
+            f"async def {_str(endpoint, 'name')}({f'body: {body}' if body else ''}):\n"
+            f'    """{description}"""\n'
+            '    return {"status": "ok"}\n'
+            "\n"
+        )
+    parts.append(
+        '\nif __name__ == "__main__":\n'
+        f'    uvicorn.run(app, host="0.0.0.0", port={_str(ctx, "port")})'
+    )
+    return "".join(parts)
+
+
+def _render_react_component(ctx: dict) -> str:
+    has_state = ctx.get("has_state")
+    parts = ['import React from "react";\n']
+    if has_state:
+        parts.append('import { useState, useEffect } from "react";')
+    parts.append("\n\n")
+    for type_ in _list(ctx, "types"):
+        parts.append(f"\ninterface {_str(type_, 'name')} {{\n")
+        for field in _list(type_, "fields"):
+            parts.append(f"\n  {_str(field, 'name')}: {_str(field, 'ts_type')};\n")
+        parts.append("\n}\n")
+    parts.append(f"\n\nexport function {_str(ctx, 'name')}() {{\n")
+    if has_state:
+        parts.append(
+            f"\n  const [data, setData] = useState<{_str(ctx, 'main_type')}[]>([]);\n"
+            "  useEffect(() => {\n"
+            f'    fetch("{_str(ctx, "api_url")}").then(r => r.json()).then(setData);\n'
+            "  }, []);\n"
+        )
+    parts.append(
+        "\n  return (\n"
+        f'    <div className="{_str(ctx, "css_class")}">\n'
+        f"      <h2>{_str(ctx, 'display_name')}</h2>\n"
+        "    </div>\n"
+        "  );\n"
+        "}"
+    )
+    return "".join(parts)
+
+
+def _render_dockerfile(ctx: dict) -> str:
+    parts = [f"FROM {_str(ctx, 'base_image')}\nWORKDIR /app\n"]
+    for step in _list(ctx, "build_steps"):
+        parts.append(f"\n{step}\n")
+    parts.append(f"\nCMD {_str(ctx, 'cmd')}")
+    return "".join(parts)
+
+
+_FAST_RENDERERS = {
+    "fastapi_service": _render_fastapi_service,
+    "react_component": _render_react_component,
+    "dockerfile": _render_dockerfile,
+}
+
+
+def render_template(template: str, /, **ctx) -> str:
+    """Render a scaffold template, using its string builder when the context fits."""
+    try:
+        return _FAST_RENDERERS[template](ctx)
+    except _Unsupported:
+        return get_jinja_env().get_template(template).render(**ctx)
+
+
+# ── Generated file storage ─────────────────────────────────────────────────
+# Rendered files live on disk under scaffolds/<job_id>/; job.generated_files holds
+# the JSON list of their relative paths. Older jobs store a {path: content} dict.
+
+
+def scaffold_dir(job_id: str) -> Path:
+    return get_data_dir() / "scaffolds" / job_id
+
+
+def _write_generated_files(root: Path, files: list[tuple[str, str]]) -> None:
+    base = root.resolve()
+    for rel_path, code in files:
+        target = (root / rel_path).resolve()
+        if not target.is_relative_to(base):
+            raise ValueError(f"Generated path escapes the job directory: {rel_path}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(code.encode("utf-8"))
+
+
+def _render_and_write(root: Path, comp_specs: list[dict]) -> list[list[str]]:
+    """Render and write components in order, returning each one's relative paths."""
+    paths = []
+    for comp_spec in comp_specs:
+        files = _render_component(comp_spec)
+        _write_generated_files(root, files)
+        paths.append([path for path, _ in files])
+    return paths
+
+
+def _read_generated_files(job_id: str, manifest: list[str]) -> dict[str, str]:
+    root = scaffold_dir(job_id)
+    files = {}
+    for rel_path in manifest:
+        try:
+            files[rel_path] = (root / rel_path).read_bytes().decode("utf-8")
+        except OSError as e:
+            logger.warning("scaffold.file_missing", job_id=job_id, path=rel_path, error=str(e))
+    return files
+
+
+async def load_generated_files(job: ScaffoldJob) -> dict[str, str] | None:
+    """Return {path: content} for a job, reading manifest entries from disk off the event loop."""
+    if not job.generated_files:
+        return None
+    data = orjson.loads(job.generated_files)
+    if isinstance(data, dict):
+        return data
+    return await asyncio.to_thread(_read_generated_files, job.id, data)
+
+
+def _render_component(comp_spec: dict) -> list[tuple[str, str]]:
+    """Render one spec component into (relative path, content) pairs."""
+    name = comp_spec.get("name", "unknown")
+    tech = comp_spec.get("tech", "fastapi")
+
+    if tech in ("fastapi", "flask", "python"):
+        code = render_template("fastapi_service", **comp_spec, display_name=name)
+        dockerfile = render_template(
+            "dockerfile",
+            base_image="python:3.12-slim",
+            build_steps=["COPY requirements.txt .", "RUN pip install -r requirements.txt", "COPY . ."],
+            cmd=f'["uvicorn", "main:app", "--host", "0.0.0.0", "--port", "{comp_spec.get("port", 8000)}"]',
+        )
+        return [(f"{name}/main.py", code), (f"{name}/Dockerfile", dockerfile)]
+    if tech in ("react", "nextjs", "typescript"):
+        comp_spec.setdefault("types", comp_spec.get("models", []))
+        comp_spec.setdefault("main_type", comp_spec["types"][0]["name"] if comp_spec["types"] else "any")
+        comp_spec.setdefault("css_class", name.lower().replace(" ", "-"))
+        comp_spec.setdefault("display_name", name)
+        code = render_template("react_component", **comp_spec)
+        return [(f"{name}/src/{name}.tsx", code)]
+    return []
 
 
 async def run_scaffold_job(job_id: str, db: AsyncSession):
+    # Publish "generating" with one UPDATE in its own short transaction; everything
+    # else the job writes is committed once at the end
+    async with async_session() as status_db:
+        marked = await status_db.execute(
+            update(ScaffoldJob).where(ScaffoldJob.id == job_id).values(status="generating")
+        )
+        await status_db.commit()
+    if not marked.rowcount:
+        return
+
     result = await db.execute(select(ScaffoldJob).where(ScaffoldJob.id == job_id))
     job = result.scalar_one_or_none()
     if not job:
         return
 
-    job.status = "generating"
-    await db.flush()
-    await db.commit()
-
     try:
-        component_ids = json.loads(job.component_ids)
+        component_ids = orjson.loads(job.component_ids)
+        # Only the columns the prompt uses; plain rows skip ORM identity-map work
         comp_result = await db.execute(
-            select(CanvasComponent).where(CanvasComponent.id.in_(component_ids))
+            select(
+                CanvasComponent.name,
+                CanvasComponent.component_type,
+                CanvasComponent.tech_stack,
+                CanvasComponent.description,
+            ).where(CanvasComponent.id.in_(component_ids))
         )
-        components = comp_result.scalars().all()
+        components = comp_result.all()
 
         comp_descriptions = []
         for c in components:
@@ -114,40 +364,38 @@ Generate a JSON specification for code scaffolding. For each component, output:
 }}"""
 
         spec = await llm_generate(prompt, system="You are a code architect. Output valid JSON only.")
-        job.spec_json = json.dumps(spec)
-
-        generated_files = {}
-        for comp_spec in spec.get("components", []):
-            name = comp_spec.get("name", "unknown")
-            tech = comp_spec.get("tech", "fastapi")
-
-            if tech in ("fastapi", "flask", "python"):
-                template = jinja_env.from_string(TEMPLATES["fastapi_service"])
-                code = template.render(**comp_spec, display_name=name)
-                generated_files[f"{name}/main.py"] = code
-                df_template = jinja_env.from_string(TEMPLATES["dockerfile"])
-                generated_files[f"{name}/Dockerfile"] = df_template.render(
-                    base_image="python:3.12-slim",
-                    build_steps=["COPY requirements.txt .", "RUN pip install -r requirements.txt", "COPY . ."],
-                    cmd=f'["uvicorn", "main:app", "--host", "0.0.0.0", "--port", "{comp_spec.get("port", 8000)}"]',
-                )
-            elif tech in ("react", "nextjs", "typescript"):
-                template = jinja_env.from_string(TEMPLATES["react_component"])
-                comp_spec.setdefault("types", comp_spec.get("models", []))
-                comp_spec.setdefault("main_type", comp_spec["types"][0]["name"] if comp_spec["types"] else "any")
-                comp_spec.setdefault("css_class", name.lower().replace(" ", "-"))
-                comp_spec.setdefault("display_name", name)
-                code = template.render(**comp_spec)
-                generated_files[f"{name}/src/{name}.tsx"] = code
-
-        job.generated_files = json.dumps(generated_files)
+        job.spec_json = orjson.dumps(spec).decode()
+
+        # Each worker thread renders and writes its components' files straight
+        # away, so only paths come back. Paths start with the component name, so
+        # same-named components share a worker and later ones win, as in the spec.
+        components = spec.get("components", [])
+        groups: dict[str, list[int]] = {}
+        for i, c in enumerate(components):
+            groups.setdefault(str(c.get("name", "unknown")), []).append(i)
+        root = scaffold_dir(job.id)
+        written = await asyncio.gather(
+            *(
+                asyncio.to_thread(_render_and_write, root, [components[i] for i in indexes])
+                for indexes in groups.values()
+            )
+        )
+        paths_by_index: dict[int, list[str]] = {}
+        for indexes, group_paths in zip(groups.values(), written):
+            paths_by_index.update(zip(indexes, group_paths))
+        # Spec order, deduplicated
+        manifest = dict.fromkeys(
+            path for i in range(len(components)) for path in paths_by_index[i]
+        )
+
+        job.generated_files = orjson.dumps(list(manifest)).decode()
         job.status = "review"
         job.completed_at = datetime.now(timezone.utc)
 
     except Exception as e:
+        await asyncio.to_thread(shutil.rmtree, scaffold_dir(job.id), True)
         job.status = "failed"
         job.error_message = str(e)
         job.completed_at = datetime.now(timezone.utc)
 
-    await db.flush()
     await db.commit()